@@ -0,0 +1,127 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from board import move_to_uci
+from chess_bot import Chessbot
+from fen import read_fens
+
+# Positions queued per worker, enough to keep every worker busy while
+# results are handed out in input order, without reading the whole file
+POSITIONS_PER_WORKER = 4
+
+# The bot of this worker process, its hash table reused for every position
+_worker_bot = None
+
+
+def start_worker(engine, hash_size_mb):
+    """
+    create the bot of a worker process.
+    """
+
+    global _worker_bot
+    _worker_bot = Chessbot(engine=engine, hash_size_mb=hash_size_mb)
+
+
+def analyse_fen(fen, depth=None, movetime=None):
+    """
+    search the position of fen in this worker process.
+    return (fen, best move, score, pv, nodes, error), moves in uci notation.
+    error is None, or the message of what went wrong, then there is no result.
+    """
+
+    # A bad line must not stop the positions after it
+    try:
+        _worker_bot.set_fen(fen)
+        best_move, score, pv = _worker_bot.search(depth=depth, movetime=movetime)
+    except Exception as error:
+        return (fen, None, None, [], 0, f"{type(error).__name__}: {error}")
+    return (
+        fen,
+        move_to_uci(best_move) if best_move else None,
+        score,
+        [move_to_uci(move) for move in pv],
+        _worker_bot.nodes,
+        None,
+    )
+
+
+def analyse_positions(
+    fens, depth=None, movetime=None, workers=None, engine="bitboard", hash_size_mb=16
+):
+    """
+    search every fen of the iterable fens on a pool of worker processes, each
+    to depth or for movetime seconds. yield analyse_fen results in input order
+    as soon as they are ready, reading fens only as far ahead as the pool needs.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=start_worker,
+        initargs=(engine, hash_size_mb),
+    ) as executor:
+        pending = deque()
+        for fen in fens:
+            pending.append(executor.submit(analyse_fen, fen, depth, movetime))
+            if len(pending) >= workers * POSITIONS_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def analyse_file(path, depth=None, movetime=None, workers=None, engine="bitboard"):
+    """
+    analyse_positions for every position in a file of fen or epd lines.
+    """
+
+    yield from analyse_positions(
+        read_fens(path), depth=depth, movetime=movetime, workers=workers, engine=engine
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="analyse every position of a fen or epd file on all cores"
+    )
+    parser.add_argument("path", help="file with one fen or epd position per line")
+    parser.add_argument("--depth", type=int, help="search depth per position")
+    parser.add_argument("--movetime", type=float, help="seconds per position")
+    parser.add_argument("--workers", type=int, help="processes, default every core")
+    parser.add_argument(
+        "--engine", choices=["mailbox", "bitboard", "compact"], default="bitboard"
+    )
+    arguments = parser.parse_args()
+
+    start_time = time.perf_counter()
+    count = 0
+    errors = 0
+    for fen, best_move, score, pv, nodes, error in analyse_file(
+        arguments.path,
+        depth=arguments.depth,
+        movetime=arguments.movetime,
+        workers=arguments.workers,
+        engine=arguments.engine,
+    ):
+        if error is not None:
+            print(f"error in {fen!r}: {error}", file=sys.stderr)
+            errors += 1
+            continue
+
+        # One epd style line per position
+        print(f'{fen}; bm {best_move}; ce {score}; acn {nodes}; pv "{" ".join(pv)}";')
+        count += 1
+
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"analysed {count} positions in {elapsed:.1f}s, "
+        f"{count / max(elapsed, 1e-9):.1f} positions/s, {errors} errors",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
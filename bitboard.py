@@ -0,0 +1,512 @@
+from board import STARTING_FEN, PROMOTION_NAMES
+from magic import bishop_attacks, rook_attacks
+from fen import parse_fen, format_fen
+from zobrist import PIECE_CODE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, SIDE_KEY
+from tables import (
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+    CASTLING_MASKS,
+    KNIGHT_ATTACKS,
+    KING_ATTACKS,
+    PAWN_ATTACKS,
+    DIAGONAL_RAYS,
+    STRAIGHT_RAYS,
+)
+
+# Squares are numbered row * 8 + column, row 0 is black's back rank like in
+# Board.current_position. bit n of a bitboard is square n.
+
+# Piece codes are color * 6 + piece type, -1 is an empty square
+PIECE_NAMES = ["p", "n", "b", "r", "q", "k"]
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+WHITE, BLACK = 0, 1
+COLOR_NAMES = ["w", "b"]
+
+# Color and piece name of every piece code, like "wq"
+CODE_NAMES = [color + piece_name for color in COLOR_NAMES for piece_name in PIECE_NAMES]
+
+# (row, col) of every square, so moves are handed out in the same form as Board
+SQUARE_LOCATIONS = [(square // 8, square % 8) for square in range(64)]
+
+# Rows used by pawns
+ROW_MASKS = [0xFF << (8 * row) for row in range(8)]
+
+
+class BitboardBoard:
+    """
+    bitboard position: 12 piece bitboards plus occupancy, as python ints.
+    same move api as Board, moves are (from_location, target_location, promotion).
+    """
+
+    def set_fen(self, fen):
+        """
+        load position from fen string. missing fields default to white to move,
+        castling wherever king and rook stand on their starting squares, no en passant.
+        """
+
+        (
+            squares,
+            self.side,
+            self.castling_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.fullmove_number,
+            self.hash,
+        ) = parse_fen(fen)
+
+        # Piece placement
+        self.pieces = [0] * 12
+        self.occupancy = [0, 0]
+        self.squares = list(squares)
+        for square, code in enumerate(self.squares):
+            if code >= 0:
+                self.pieces[code] |= 1 << square
+                self.occupancy[code // 6] |= 1 << square
+
+    def fen(self):
+        """
+        return the fen string of the position.
+        """
+
+        return format_fen(
+            self.squares,
+            self.side,
+            self.castling_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.fullmove_number,
+        )
+
+    def __init__(self, fen=STARTING_FEN):
+        self.set_fen(fen)
+
+        # Undo records of the moves made, newest last
+        self.move_stack = []
+
+    def compute_hash(self):
+        """
+        return the zobrist hash of the position, computed from scratch.
+        make_move and unmake_move keep self.hash up to date without this.
+        """
+
+        zobrist_hash = 0
+        for square, code in enumerate(self.squares):
+            if code >= 0:
+                zobrist_hash ^= PIECE_CODE_KEYS[code][square]
+
+        zobrist_hash ^= CASTLING_KEYS[self.castling_rights]
+        if self.en_passant >= 0:
+            zobrist_hash ^= EN_PASSANT_KEYS[self.en_passant % 8]
+        if self.side == BLACK:
+            zobrist_hash ^= SIDE_KEY
+        return zobrist_hash
+
+    @property
+    def turn(self):
+        return COLOR_NAMES[self.side]
+
+    def attacked(self, square, by_side):
+        """
+        check if square index is attacked by by_side (WHITE or BLACK).
+        """
+
+        pieces = self.pieces
+        base = by_side * 6
+        if KNIGHT_ATTACKS[square] & pieces[base + KNIGHT]:
+            return True
+        # a pawn attacks square if a pawn of the other color on square would attack it
+        if PAWN_ATTACKS[1 - by_side][square] & pieces[base + PAWN]:
+            return True
+        if KING_ATTACKS[square] & pieces[base + KING]:
+            return True
+
+        occupied = self.occupancy[0] | self.occupancy[1]
+        queens = pieces[base + QUEEN]
+        if bishop_attacks(square, occupied) & (pieces[base + BISHOP] | queens):
+            return True
+        if rook_attacks(square, occupied) & (pieces[base + ROOK] | queens):
+            return True
+        return False
+
+    def is_square_attacked(self, square, by_color):
+        """
+        check if a piece of by_color attacks square (row, col).
+        """
+
+        row, column = square
+        return self.attacked(row * 8 + column, COLOR_NAMES.index(by_color))
+
+    def piece_at(self, location):
+        """
+        return color and name of the piece on location (row, col), like "wq", or None.
+        """
+
+        code = self.squares[location[0] * 8 + location[1]]
+        return None if code < 0 else CODE_NAMES[code]
+
+    def king_square(self, side):
+        return self.pieces[side * 6 + KING].bit_length() - 1
+
+    def is_check(self):
+        """
+        check if the king of the side to move is attacked.
+        """
+
+        return self.attacked(self.king_square(self.side), 1 - self.side)
+
+    def pinned(self, side):
+        """
+        return bitboard of side's pieces pinned to their king.
+        """
+
+        king_square = self.king_square(side)
+        occupied = self.occupancy[0] | self.occupancy[1]
+        own = self.occupancy[side]
+        base = (1 - side) * 6
+        queens = self.pieces[base + QUEEN]
+
+        pinned = 0
+        for rays, sliders in [
+            (DIAGONAL_RAYS, self.pieces[base + BISHOP] | queens),
+            (STRAIGHT_RAYS, self.pieces[base + ROOK] | queens),
+        ]:
+            if not sliders:
+                continue
+            for masks, ascending in rays:
+                blockers = masks[king_square] & occupied
+                if not blockers:
+                    continue
+
+                # First piece on the ray must be ours, the second an enemy slider
+                if ascending:
+                    first = blockers & -blockers
+                    blockers ^= first
+                    second = blockers & -blockers
+                else:
+                    first = 1 << (blockers.bit_length() - 1)
+                    blockers ^= first
+                    second = 1 << (blockers.bit_length() - 1) if blockers else 0
+                if first & own and second & sliders:
+                    pinned |= first
+        return pinned
+
+    def pseudo_legal_moves(self):
+        """
+        return moves as (from_square, target_square, promotion) ignoring king safety.
+        """
+
+        moves = []
+        side = self.side
+        pieces = self.pieces
+        own = self.occupancy[side]
+        enemy = self.occupancy[1 - side]
+        occupied = own | enemy
+        empty = ~occupied
+        squares = self.squares
+        base = side * 6
+
+        # Pawns
+        pawns = pieces[base + PAWN]
+        if side == WHITE:
+            forward, start_row, promotion_row = -8, ROW_MASKS[6], ROW_MASKS[0]
+        else:
+            forward, start_row, promotion_row = 8, ROW_MASKS[1], ROW_MASKS[7]
+        capture_targets = enemy
+        if self.en_passant >= 0:
+            capture_targets |= 1 << self.en_passant
+
+        while pawns:
+            bit = pawns & -pawns
+            pawns ^= bit
+            square = bit.bit_length() - 1
+
+            targets = PAWN_ATTACKS[side][square] & capture_targets
+            push = square + forward
+            if empty >> push & 1:
+                targets |= 1 << push
+                if bit & start_row and empty >> (push + forward) & 1:
+                    targets |= 1 << (push + forward)
+
+            while targets:
+                target_bit = targets & -targets
+                targets ^= target_bit
+                target = target_bit.bit_length() - 1
+                if target_bit & promotion_row:
+                    for promotion in PROMOTION_NAMES:
+                        moves.append((square, target, promotion))
+                else:
+                    moves.append((square, target, None))
+
+        # Pieces
+        not_own = ~own
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            bitboard = pieces[base + piece_type]
+            while bitboard:
+                bit = bitboard & -bitboard
+                bitboard ^= bit
+                square = bit.bit_length() - 1
+
+                if piece_type == KNIGHT:
+                    targets = KNIGHT_ATTACKS[square]
+                elif piece_type == BISHOP:
+                    targets = bishop_attacks(square, occupied)
+                elif piece_type == ROOK:
+                    targets = rook_attacks(square, occupied)
+                elif piece_type == QUEEN:
+                    targets = bishop_attacks(square, occupied) | rook_attacks(
+                        square, occupied
+                    )
+                else:
+                    targets = KING_ATTACKS[square]
+                targets &= not_own
+
+                while targets:
+                    target_bit = targets & -targets
+                    targets ^= target_bit
+                    moves.append((square, target_bit.bit_length() - 1, None))
+
+        # Castling, king and rook on their starting squares, king and passed
+        # square not attacked, the target is checked with the other moves
+        if side == WHITE:
+            castles = [
+                (WHITE_KINGSIDE, 60, 63, 62, 61, 0b11 << 61),
+                (WHITE_QUEENSIDE, 60, 56, 58, 59, 0b111 << 57),
+            ]
+        else:
+            castles = [
+                (BLACK_KINGSIDE, 4, 7, 6, 5, 0b11 << 5),
+                (BLACK_QUEENSIDE, 4, 0, 2, 3, 0b111 << 1),
+            ]
+        for right, king_square, rook_square, target, passed_square, between in castles:
+            if (
+                self.castling_rights & right
+                and squares[king_square] == base + KING
+                and squares[rook_square] == base + ROOK
+                and not occupied & between
+                and not self.attacked(king_square, 1 - side)
+                and not self.attacked(passed_square, 1 - side)
+            ):
+                moves.append((king_square, target, None))
+
+        return moves
+
+    def legal_moves(self):
+        """
+        return all legal moves for the side to move as (from_location, target_location, promotion).
+        """
+
+        side = self.side
+        king_square = self.king_square(side)
+        in_check = self.attacked(king_square, 1 - side)
+        pinned = self.pinned(side)
+
+        moves = []
+        for square, target, promotion in self.pseudo_legal_moves():
+            # Moves that can't expose the king need no test
+            if (
+                not in_check
+                and square != king_square
+                and not pinned >> square & 1
+                and target != self.en_passant
+            ):
+                moves.append(
+                    (SQUARE_LOCATIONS[square], SQUARE_LOCATIONS[target], promotion)
+                )
+                continue
+
+            self.make_square_move(square, target, promotion)
+            if not self.attacked(self.king_square(side), 1 - side):
+                moves.append(
+                    (SQUARE_LOCATIONS[square], SQUARE_LOCATIONS[target], promotion)
+                )
+            self.unmake_move()
+
+        return moves
+
+    def detect_checkmate(self):
+        """
+        check if current player is mated.
+        return "checkmate", "stalemate" or None.
+        """
+
+        if self.legal_moves():
+            return None
+        if self.is_check():
+            return "checkmate"
+        else:
+            return "stalemate"
+
+    def make_move(self, move):
+        """
+        make the move in place and push an undo record for unmake_move.
+        move is (from_location, target_location, promotion) as returned by legal_moves.
+        """
+
+        (from_row, from_column), (target_row, target_column), promotion = move
+        self.make_square_move(
+            from_row * 8 + from_column, target_row * 8 + target_column, promotion
+        )
+
+    def make_square_move(self, square, target, promotion=None):
+        """
+        make_move with square indexes.
+        """
+
+        pieces = self.pieces
+        occupancy = self.occupancy
+        squares = self.squares
+        side = self.side
+
+        piece = squares[square]
+        captured = squares[target]
+        captured_square = target
+        piece_type = piece - side * 6
+
+        # Undo record: squares, moved and captured piece, and the irreversible state
+        self.move_stack.append(
+            (
+                square,
+                target,
+                piece,
+                captured,
+                self.castling_rights,
+                self.en_passant,
+                self.halfmove_clock,
+                self.hash,
+            )
+        )
+
+        zobrist_hash = (
+            self.hash ^ PIECE_CODE_KEYS[piece][square] ^ PIECE_CODE_KEYS[piece][target]
+        )
+        if captured >= 0:
+            zobrist_hash ^= PIECE_CODE_KEYS[captured][target]
+        if self.en_passant >= 0:
+            zobrist_hash ^= EN_PASSANT_KEYS[self.en_passant % 8]
+
+        move_bits = (1 << square) | (1 << target)
+        pieces[piece] ^= move_bits
+        occupancy[side] ^= move_bits
+        squares[square] = -1
+        squares[target] = piece
+
+        if captured >= 0:
+            pieces[captured] ^= 1 << target
+            occupancy[1 - side] ^= 1 << target
+
+        en_passant = -1
+        if piece_type == PAWN:
+            # En passant, the captured pawn stands behind the target square
+            if target == self.en_passant:
+                captured_square = target + 8 if side == WHITE else target - 8
+                captured = squares[captured_square]
+                pieces[captured] ^= 1 << captured_square
+                occupancy[1 - side] ^= 1 << captured_square
+                squares[captured_square] = -1
+                zobrist_hash ^= PIECE_CODE_KEYS[captured][captured_square]
+
+            elif promotion:
+                promoted = side * 6 + PIECE_NAMES.index(promotion)
+                pieces[piece] ^= 1 << target
+                pieces[promoted] |= 1 << target
+                squares[target] = promoted
+                zobrist_hash ^= (
+                    PIECE_CODE_KEYS[piece][target] ^ PIECE_CODE_KEYS[promoted][target]
+                )
+
+            elif target - square == 16 or square - target == 16:
+                en_passant = (square + target) // 2
+                zobrist_hash ^= EN_PASSANT_KEYS[en_passant % 8]
+
+        # Castling, move the rook too
+        elif piece_type == KING and (target - square == 2 or square - target == 2):
+            if target > square:
+                rook_square, rook_target = square + 3, square + 1
+            else:
+                rook_square, rook_target = square - 4, square - 1
+            rook = side * 6 + ROOK
+            rook_bits = (1 << rook_square) | (1 << rook_target)
+            pieces[rook] ^= rook_bits
+            occupancy[side] ^= rook_bits
+            squares[rook_square] = -1
+            squares[rook_target] = rook
+            zobrist_hash ^= (
+                PIECE_CODE_KEYS[rook][rook_square] ^ PIECE_CODE_KEYS[rook][rook_target]
+            )
+
+        castling_rights = self.castling_rights & (
+            CASTLING_MASKS[square] & CASTLING_MASKS[target]
+        )
+        zobrist_hash ^= (
+            CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[castling_rights]
+        )
+        self.castling_rights = castling_rights
+        self.hash = zobrist_hash ^ SIDE_KEY
+        self.en_passant = en_passant
+        if piece_type == PAWN or captured >= 0:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if side == BLACK:
+            self.fullmove_number += 1
+        self.side = 1 - side
+
+    def unmake_move(self):
+        """
+        take back the last move made with make_move.
+        """
+
+        (
+            square,
+            target,
+            piece,
+            captured,
+            self.castling_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.hash,
+        ) = self.move_stack.pop()
+
+        pieces = self.pieces
+        occupancy = self.occupancy
+        squares = self.squares
+        side = 1 - self.side
+        self.side = side
+        if side == BLACK:
+            self.fullmove_number -= 1
+
+        # Remove whatever stands on the target (the promoted piece, if any)
+        landed = squares[target]
+        pieces[landed] ^= 1 << target
+        pieces[piece] |= 1 << square
+        occupancy[side] ^= (1 << square) | (1 << target)
+        squares[square] = piece
+        squares[target] = -1
+
+        piece_type = piece - side * 6
+        if piece_type == PAWN and target == self.en_passant:
+            # En passant, the captured pawn goes back behind the target square
+            captured_square = target + 8 if side == WHITE else target - 8
+            captured = (1 - side) * 6 + PAWN
+            pieces[captured] |= 1 << captured_square
+            occupancy[1 - side] |= 1 << captured_square
+            squares[captured_square] = captured
+
+        elif captured >= 0:
+            pieces[captured] |= 1 << target
+            occupancy[1 - side] |= 1 << target
+            squares[target] = captured
+
+        elif piece_type == KING and (target - square == 2 or square - target == 2):
+            if target > square:
+                rook_square, rook_target = square + 3, square + 1
+            else:
+                rook_square, rook_target = square - 4, square - 1
+            rook = side * 6 + ROOK
+            rook_bits = (1 << rook_square) | (1 << rook_target)
+            pieces[rook] ^= rook_bits
+            occupancy[side] ^= rook_bits
+            squares[rook_target] = -1
+            squares[rook_square] = rook
@@ -0,0 +1,768 @@
+from collections import OrderedDict
+
+from tables import (
+    CASTLING_MASKS,
+    KNIGHT_SQUARES,
+    KING_SQUARES,
+    PAWN_CAPTURE_SQUARES,
+    PAWN_PUSH_SQUARES,
+    DIAGONAL_RAY_SQUARES,
+    STRAIGHT_RAY_SQUARES,
+    QUEEN_RAY_SQUARES,
+)
+from fen import CASTLING_LETTERS, parse_fen, format_fen
+from zobrist import PIECE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, SIDE_KEY
+
+# Starting position, as placement part of a fen string
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+
+# Pieces a pawn can promote to
+PROMOTION_NAMES = ["q", "r", "b", "n"]
+
+# Positions whose legal moves a board keeps, least recently used dropped first
+LEGAL_MOVE_CACHE_SIZE = 256
+
+
+def square_name(location):
+    """
+    return the name of square (row, col), like "e4".
+    """
+
+    row, column = location
+    return "abcdefgh"[column] + str(8 - row)
+
+
+def move_to_uci(move):
+    """
+    return move (from_location, target_location, promotion) in uci notation, like "e7e8q".
+    crazyhouse drops (None, target_location, piece_name) are like "N@f3".
+    """
+
+    from_location, target_location, promotion = move
+    if from_location is None:
+        return promotion.upper() + "@" + square_name(target_location)
+    return square_name(from_location) + square_name(target_location) + (promotion or "")
+
+
+def is_square_attacked(current_position, square, by_color):
+    """
+    check if a piece of by_color attacks square (row, col) in current_position.
+    probes outward from the square instead of generating the enemy's moves.
+    """
+
+    row, column = square
+
+    # Knight jumps
+    for new_row, new_column in KNIGHT_SQUARES[row][column]:
+        piece = current_position[new_row][new_column]
+        if piece is not None and piece.piece_name == "n" and piece.color == by_color:
+            return True
+
+    # Pawn diagonals, an enemy pawn attacks square from where one of ours would capture
+    own_color = "b" if by_color == "w" else "w"
+    for new_row, new_column in PAWN_CAPTURE_SQUARES[own_color][row][column]:
+        piece = current_position[new_row][new_column]
+        if piece is not None and piece.piece_name == "p" and piece.color == by_color:
+            return True
+
+    # King adjacency
+    for new_row, new_column in KING_SQUARES[row][column]:
+        piece = current_position[new_row][new_column]
+        if piece is not None and piece.piece_name == "k" and piece.color == by_color:
+            return True
+
+    # Slider rays, the first piece on each ray decides
+    for rays, slider_names in [
+        (DIAGONAL_RAY_SQUARES[row][column], ("b", "q")),
+        (STRAIGHT_RAY_SQUARES[row][column], ("r", "q")),
+    ]:
+        for ray in rays:
+            for new_row, new_column in ray:
+                piece = current_position[new_row][new_column]
+                if piece is not None:
+                    if piece.color == by_color and piece.piece_name in slider_names:
+                        return True
+                    break
+
+    return False
+
+
+class Board:
+    """
+    headless position and rules. no pygame, used by the gui, the bot and anything else.
+    """
+
+    def fen_to_current_position(self, fen):
+        """
+        from given fen string create self.current_position as a 2d-list with piece objects.
+        missing fields default to white to move, castling wherever king and rook
+        stand on their starting squares, no en passant.
+        """
+
+        (
+            squares,
+            side,
+            self.castling_rights,
+            en_passant,
+            self.halfmove_clock,
+            self.fullmove_number,
+            self.hash,
+        ) = parse_fen(fen)
+
+        # Kings and rooks that may still castle are the only unmoved ones
+        unmoved_squares = set()
+        for right, _, king_square, rook_square in CASTLING_LETTERS:
+            if self.castling_rights & right:
+                unmoved_squares.update((king_square, rook_square))
+
+        self.current_position = [[None] * 8 for _ in range(8)]
+        for square, code in enumerate(squares):
+            if code >= 0:
+                row, column = divmod(square, 8)
+                piece = Piece("wb"[code // 6], "pnbrqk"[code % 6], row, column)
+                if piece.piece_name in ("k", "r") and square not in unmoved_squares:
+                    piece.has_moved = True
+                self.current_position[row][column] = piece
+
+        # Side to move
+        self.turn = "b" if side else "w"
+
+        # En passant square, recreate the double pawn push that allowed it
+        self.previous_move = []
+        if en_passant >= 0:
+            row, column = divmod(en_passant, 8)
+            if row == 5:
+                self.previous_move = ["p", (6, column), (4, column)]
+            else:
+                self.previous_move = ["p", (1, column), (3, column)]
+
+        # Pieces of each color and where the kings stand, kept up to date by make_move
+        self.piece_lists = {"w": [], "b": []}
+        self.king_squares = {"w": None, "b": None}
+        for row in self.current_position:
+            for piece in row:
+                if piece is not None:
+                    self.piece_lists[piece.color].append(piece)
+                    if piece.piece_name == "k":
+                        self.king_squares[piece.color] = piece.location
+
+    def fen(self):
+        """
+        return the fen string of the position.
+        """
+
+        squares = [-1] * 64
+        for color, color_index in [("w", 0), ("b", 1)]:
+            for piece in self.piece_lists[color]:
+                row, column = piece.location
+                squares[row * 8 + column] = color_index * 6 + "pnbrqk".index(
+                    piece.piece_name
+                )
+
+        en_passant_column = self.en_passant_column()
+        if en_passant_column is None:
+            en_passant = -1
+        else:
+            en_passant = (5 if self.turn == "b" else 2) * 8 + en_passant_column
+
+        return format_fen(
+            squares,
+            0 if self.turn == "w" else 1,
+            self.castling_rights,
+            en_passant,
+            self.halfmove_clock,
+            self.fullmove_number,
+        )
+
+    def __init__(self, fen=STARTING_FEN):
+        # Undo records of the moves made, newest last
+        self.move_stack = []
+
+        # Legal moves by zobrist hash, see cached_legal_moves
+        self.legal_move_cache = OrderedDict()
+
+        # Position, side to move, castling and en passant state
+        self.fen_to_current_position(fen)
+
+    def en_passant_column(self):
+        """
+        return the column a pawn can be taken en passant on, or None.
+        """
+
+        if (
+            len(self.previous_move) == 3
+            and self.previous_move[0] == "p"
+            and abs(self.previous_move[1][0] - self.previous_move[2][0]) == 2
+        ):
+            return self.previous_move[2][1]
+        return None
+
+    def compute_hash(self):
+        """
+        return the zobrist hash of the position, computed from scratch.
+        make_move and unmake_move keep self.hash up to date without this.
+        """
+
+        zobrist_hash = 0
+        for row in self.current_position:
+            for piece in row:
+                if piece is not None:
+                    piece_row, piece_column = piece.location
+                    zobrist_hash ^= PIECE_KEYS[piece.color][piece.piece_name][
+                        piece_row * 8 + piece_column
+                    ]
+
+        zobrist_hash ^= CASTLING_KEYS[self.castling_rights]
+        en_passant_column = self.en_passant_column()
+        if en_passant_column is not None:
+            zobrist_hash ^= EN_PASSANT_KEYS[en_passant_column]
+        if self.turn == "b":
+            zobrist_hash ^= SIDE_KEY
+        return zobrist_hash
+
+    def legal_moves(self):
+        """
+        return all legal moves for the side to move as (from_location, target_location, promotion).
+        promotion is the promoted piece name, or None.
+        """
+
+        moves = []
+        promotion_row = 0 if self.turn == "w" else 7
+        king_location = self.king_squares[self.turn]
+
+        for piece in self.piece_lists[self.turn]:
+            from_location = piece.location
+            for target_location in piece.show_legal_moves(
+                self.current_position, self.previous_move, True, king_location
+            ):
+                if piece.piece_name == "p" and target_location[0] == promotion_row:
+                    for promotion in PROMOTION_NAMES:
+                        moves.append((from_location, target_location, promotion))
+                else:
+                    moves.append((from_location, target_location, None))
+
+        return moves
+
+    def cached_legal_moves(self):
+        """
+        return legal_moves of the position, generated once per zobrist hash.
+        the gui and detect_checkmate share them, callers must not change the list.
+        """
+
+        moves = self.legal_move_cache.get(self.hash)
+        if moves is None:
+            moves = self.legal_moves()
+            self.legal_move_cache[self.hash] = moves
+            if len(self.legal_move_cache) > LEGAL_MOVE_CACHE_SIZE:
+                self.legal_move_cache.popitem(last=False)
+        else:
+            self.legal_move_cache.move_to_end(self.hash)
+        return moves
+
+    def legal_targets(self, location):
+        """
+        return the target locations (row, col) of the legal moves of the piece on location.
+        """
+
+        targets = []
+        for from_location, target_location, _ in self.cached_legal_moves():
+            if from_location == location and target_location not in targets:
+                targets.append(target_location)
+        return targets
+
+    def is_check(self):
+        """
+        check if the king of the side to move is attacked.
+        """
+
+        king_location = self.king_squares[self.turn]
+        if king_location is None:
+            return False
+        return self.is_square_attacked(king_location, "b" if self.turn == "w" else "w")
+
+    def is_square_attacked(self, square, by_color):
+        """
+        check if a piece of by_color attacks square (row, col).
+        """
+
+        return is_square_attacked(self.current_position, square, by_color)
+
+    def piece_at(self, location):
+        """
+        return color and name of the piece on location (row, col), like "wq", or None.
+        """
+
+        piece = self.current_position[location[0]][location[1]]
+        return None if piece is None else piece.color + piece.piece_name
+
+    def attack_map(self, color):
+        """
+        return an 8x8 list counting how many pieces of color attack each square.
+        squares defended by color count too, pawn pushes and castling don't.
+        """
+
+        attacks = [[0] * 8 for _ in range(8)]
+
+        for piece in self.piece_lists[color]:
+            current_row, current_column = piece.location
+
+            # Pawns only attack diagonally forward
+            if piece.piece_name == "p":
+                targets = PAWN_CAPTURE_SQUARES[color][current_row][current_column]
+            elif piece.piece_name == "n":
+                targets = KNIGHT_SQUARES[current_row][current_column]
+            elif piece.piece_name == "k":
+                targets = KING_SQUARES[current_row][current_column]
+
+            # Sliders attack up to and including the first piece on each ray
+            else:
+                if piece.piece_name == "b":
+                    rays = DIAGONAL_RAY_SQUARES[current_row][current_column]
+                elif piece.piece_name == "r":
+                    rays = STRAIGHT_RAY_SQUARES[current_row][current_column]
+                else:
+                    rays = QUEEN_RAY_SQUARES[current_row][current_column]
+
+                targets = []
+                for ray in rays:
+                    for new_row, new_column in ray:
+                        targets.append((new_row, new_column))
+                        if self.current_position[new_row][new_column] is not None:
+                            break
+
+            for new_row, new_column in targets:
+                attacks[new_row][new_column] += 1
+
+        return attacks
+
+    def detect_checkmate(self):
+        """
+        check if current player is mated.
+        return "checkmate", "stalemate" or None.
+        """
+
+        # The gui asked for these moves already, so they are usually cached
+        if self.cached_legal_moves():
+            return None
+
+        if self.is_check():
+            return "checkmate"
+        else:
+            return "stalemate"
+
+    def make_move(self, move):
+        """
+        make the move in place and push an undo record for unmake_move.
+        move is (from_location, target_location, promotion) as returned by legal_moves.
+        change the previous move.
+        change the turn
+        """
+
+        (original_row, original_column), target_location, promotion = move
+        target_row, target_column = target_location
+
+        piece = self.current_position[original_row][original_column]
+        captured_piece = self.current_position[target_row][target_column]
+
+        # en passant, pawn moves diagonally to an empty square
+        en_passant = (
+            piece.piece_name == "p"
+            and captured_piece is None
+            and original_column != target_column
+        )
+        if en_passant:
+            captured_piece = self.current_position[original_row][target_column]
+
+        # Take the captured piece off its piece list, remembering where it was
+        captured_index = None
+        if captured_piece is not None:
+            captured_list = self.piece_lists[captured_piece.color]
+            captured_index = captured_list.index(captured_piece)
+            del captured_list[captured_index]
+
+        # Undo record: move, moved piece, its has_moved flag, captured piece and
+        # its piece list index, previous move (en passant state), castling rights,
+        # halfmove clock and hash. castling rooks are found from the move.
+        self.move_stack.append(
+            (
+                move,
+                piece,
+                piece.has_moved,
+                captured_piece,
+                captured_index,
+                self.previous_move,
+                self.castling_rights,
+                self.halfmove_clock,
+                self.hash,
+            )
+        )
+
+        # Update the hash with every key that changes
+        piece_keys = PIECE_KEYS[self.turn]
+        zobrist_hash = (
+            self.hash ^ piece_keys[piece.piece_name][original_row * 8 + original_column]
+        )
+        if captured_piece is not None:
+            captured_row, captured_column = captured_piece.location
+            zobrist_hash ^= PIECE_KEYS[captured_piece.color][captured_piece.piece_name][
+                captured_row * 8 + captured_column
+            ]
+        zobrist_hash ^= piece_keys[promotion or piece.piece_name][
+            target_row * 8 + target_column
+        ]
+        en_passant_column = self.en_passant_column()
+        if en_passant_column is not None:
+            zobrist_hash ^= EN_PASSANT_KEYS[en_passant_column]
+
+        self.previous_move = [
+            piece.piece_name,
+            (original_row, original_column),
+            (target_row, target_column),
+        ]
+
+        self.current_position[original_row][original_column] = None
+
+        # castling
+        if piece.piece_name == "k" and (
+            target_column - original_column > 1 or target_column - original_column < -1
+        ):
+            # get castled rook
+            rook_column, rook_target_column = (0, 3) if target_column == 2 else (7, 5)
+
+            self.previous_move = [
+                piece.piece_name,
+                (original_row, original_column),
+                (original_row, target_column),
+                (original_row, rook_column),
+                (original_row, rook_target_column),
+            ]
+
+            rook = self.current_position[original_row][rook_column]
+            self.current_position[original_row][rook_column] = None
+
+            self.current_position[original_row][rook_target_column] = rook
+            rook.location = (target_row, rook_target_column)
+            rook.has_moved = True
+
+            zobrist_hash ^= (
+                piece_keys["r"][original_row * 8 + rook_column]
+                ^ piece_keys["r"][original_row * 8 + rook_target_column]
+            )
+
+        elif en_passant:
+            self.current_position[original_row][target_column] = None
+
+        if promotion:
+            promoted_piece = Piece(self.turn, promotion, target_row, target_column)
+            promoted_piece.has_moved = True
+            promoted_piece.promoted = True
+            self.current_position[target_row][target_column] = promoted_piece
+
+            # The promoted piece takes the pawn's place in the piece list
+            piece_list = self.piece_lists[self.turn]
+            piece_list[piece_list.index(piece)] = promoted_piece
+        else:
+            self.current_position[target_row][target_column] = piece
+        piece.location = (target_row, target_column)
+        piece.has_moved = True
+
+        if piece.piece_name == "k":
+            self.king_squares[self.turn] = piece.location
+
+        # Double pawn push allows en passant
+        if piece.piece_name == "p" and abs(target_row - original_row) == 2:
+            zobrist_hash ^= EN_PASSANT_KEYS[target_column]
+
+        # Moving from or to a king or rook square loses castling rights
+        castling_rights = self.castling_rights & (
+            CASTLING_MASKS[original_row * 8 + original_column]
+            & CASTLING_MASKS[target_row * 8 + target_column]
+        )
+        zobrist_hash ^= (
+            CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[castling_rights]
+        )
+        self.castling_rights = castling_rights
+
+        # Clocks
+        if piece.piece_name == "p" or captured_piece is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if self.turn == "b":
+            self.fullmove_number += 1
+
+        self.hash = zobrist_hash ^ SIDE_KEY
+        self.turn = "w" if self.turn == "b" else "b"
+
+    def unmake_move(self):
+        """
+        take back the last move made with make_move.
+        """
+
+        (
+            move,
+            piece,
+            had_moved,
+            captured_piece,
+            captured_index,
+            self.previous_move,
+            self.castling_rights,
+            self.halfmove_clock,
+            self.hash,
+        ) = self.move_stack.pop()
+        (original_row, original_column), (target_row, target_column), promotion = move
+
+        self.turn = "w" if self.turn == "b" else "b"
+        if self.turn == "b":
+            self.fullmove_number -= 1
+
+        # The pawn takes its place in the piece list back from the promoted piece
+        if promotion:
+            promoted_piece = self.current_position[target_row][target_column]
+            piece_list = self.piece_lists[self.turn]
+            piece_list[piece_list.index(promoted_piece)] = piece
+
+        # Put the moving piece (the pawn, if it promoted) back
+        self.current_position[original_row][original_column] = piece
+        self.current_position[target_row][target_column] = None
+        piece.location = (original_row, original_column)
+        piece.has_moved = had_moved
+        if piece.piece_name == "k":
+            self.king_squares[self.turn] = piece.location
+
+        # Put the captured piece back, its location is untouched by captures
+        # (for en passant it is beside the target square)
+        if captured_piece is not None:
+            captured_row, captured_column = captured_piece.location
+            self.current_position[captured_row][captured_column] = captured_piece
+            self.piece_lists[captured_piece.color].insert(
+                captured_index, captured_piece
+            )
+
+        # castling, put the rook back
+        elif piece.piece_name == "k" and (
+            target_column - original_column > 1 or target_column - original_column < -1
+        ):
+            rook_column, rook_target_column = (0, 3) if target_column == 2 else (7, 5)
+
+            rook = self.current_position[original_row][rook_target_column]
+            self.current_position[original_row][rook_target_column] = None
+            self.current_position[original_row][rook_column] = rook
+            rook.location = (original_row, rook_column)
+            rook.has_moved = False
+
+
+class Piece:
+    # No per piece __dict__, boards hold a lot of these
+    __slots__ = ("piece_name", "color", "location", "has_moved", "promoted")
+
+    def __init__(self, color, piece_name, row, column):
+        # Initialize values
+        self.piece_name = piece_name
+        self.color = color
+        self.location = (row, column)
+        self.has_moved = False
+
+        # Promoted from a pawn, crazyhouse hands take it back as one
+        self.promoted = False
+
+    def show_legal_moves(
+        self, current_position, previous_move=None, strict=False, king_location=None
+    ):
+        """
+        return all legal moves for the piece as (row, col)
+        king_location of the own king saves searching the board for it when strict.
+        """
+        moves = []
+
+        # Get the current position of the piece
+        current_row, current_column = self.location
+
+        # Bishop, rook and queen moves, along each ray up to the first piece
+        if self.piece_name in ("b", "r", "q"):
+            if self.piece_name == "b":
+                rays = DIAGONAL_RAY_SQUARES[current_row][current_column]
+            elif self.piece_name == "r":
+                rays = STRAIGHT_RAY_SQUARES[current_row][current_column]
+            else:
+                rays = QUEEN_RAY_SQUARES[current_row][current_column]
+
+            for ray in rays:
+                for new_row, new_column in ray:
+                    if current_position[new_row][new_column] is None:
+                        moves.append((new_row, new_column))
+                    elif current_position[new_row][new_column].color != self.color:
+                        moves.append((new_row, new_column))
+                        break
+                    else:
+                        break
+
+        # King moves
+        elif self.piece_name == "k":
+            for new_row, new_column in KING_SQUARES[current_row][current_column]:
+                if current_position[new_row][new_column] is None:
+                    moves.append((new_row, new_column))
+                elif current_position[new_row][new_column].color != self.color:
+                    moves.append((new_row, new_column))
+
+            # Castling.
+            if self.has_moved == False and strict:
+                for dy, rook_column in [(-2, 0), (2, 7)]:
+                    # every square between king and rook must be empty
+                    between_columns = range(
+                        min(current_column, rook_column) + 1,
+                        max(current_column, rook_column),
+                    )
+                    if all(
+                        current_position[current_row][between_column] is None
+                        for between_column in between_columns
+                    ):
+                        rook = current_position[current_row][rook_column]
+                        if rook is None:
+                            continue
+                        else:
+                            if (
+                                rook.piece_name == "r"
+                                and rook.color == self.color
+                                and rook.has_moved == False
+                            ):
+                                # Test if king under check
+                                enemy_color = "b" if self.color == "w" else "w"
+                                under_check = is_square_attacked(
+                                    current_position, self.location, enemy_color
+                                )
+
+                                # Test if castling through check
+                                new_column = current_column + dy // 2
+
+                                king_location = (current_row, new_column)
+
+                                castling_through_check = is_square_attacked(
+                                    current_position, king_location, enemy_color
+                                )
+
+                                if not castling_through_check and not under_check:
+                                    new_column = current_column + dy
+                                    moves.append((current_row, new_column))
+
+        # Knight moves
+        elif self.piece_name == "n":
+            for new_row, new_column in KNIGHT_SQUARES[current_row][current_column]:
+                if (
+                    current_position[new_row][new_column] is None
+                    or current_position[new_row][new_column].color != self.color
+                ):
+                    moves.append((new_row, new_column))
+
+        # Pawn moves
+        elif self.piece_name == "p":
+            # Pushes, the double push only over an empty square
+            push_squares = PAWN_PUSH_SQUARES[self.color][current_row][current_column]
+            for new_row, new_column in push_squares:
+                if current_position[new_row][new_column] is not None:
+                    break
+                moves.append((new_row, new_column))
+
+            # Capturing moves
+            capture_squares = PAWN_CAPTURE_SQUARES[self.color][current_row][
+                current_column
+            ]
+            for new_row, new_column in capture_squares:
+                if (
+                    current_position[new_row][new_column] is not None
+                    and current_position[new_row][new_column].color != self.color
+                ):
+                    moves.append((new_row, new_column))
+
+            # En passant, enemy pawn just moved two squares to beside this pawn
+            en_passant_row, enemy_start_row = (3, 1) if self.color == "w" else (4, 6)
+            if current_row == en_passant_row:
+                for new_row, new_column in capture_squares:
+                    if previous_move == [
+                        "p",
+                        (enemy_start_row, new_column),
+                        (en_passant_row, new_column),
+                    ]:
+                        moves.append((new_row, new_column))
+
+        # test if move is illegal because king can be captured.
+        # every move is played on current_position in place and taken back, no copies.
+        if strict:
+            legal_moves = []
+            enemy_color = "b" if self.color == "w" else "w"
+
+            # find king, unless the caller tracks it
+            if king_location is None and self.piece_name != "k":
+                for row in current_position:
+                    for some_piece in row:
+                        if (
+                            some_piece is not None
+                            and some_piece.piece_name == "k"
+                            and some_piece.color == self.color
+                        ):
+                            king_location = some_piece.location
+
+            for move in moves:
+                # make new move location
+                new_row, new_column = move
+
+                # play the possibly illegal move
+                captured_piece = current_position[new_row][new_column]
+                en_passant_piece = None
+                if (
+                    self.piece_name == "p"
+                    and captured_piece is None
+                    and new_column != current_column
+                ):
+                    en_passant_piece = current_position[current_row][new_column]
+                    current_position[current_row][new_column] = None
+                current_position[new_row][new_column] = self
+                current_position[current_row][current_column] = None
+
+                if self.piece_name == "k":
+                    temp_king_location = move
+                else:
+                    temp_king_location = king_location
+
+                under_check = is_square_attacked(
+                    current_position, temp_king_location, enemy_color
+                )
+
+                # take the move back
+                current_position[current_row][current_column] = self
+                current_position[new_row][new_column] = captured_piece
+                if en_passant_piece is not None:
+                    current_position[current_row][new_column] = en_passant_piece
+
+                if not under_check:
+                    legal_moves.append(move)
+
+            moves = legal_moves
+
+        return moves
+
+
+def create_board(fen=STARTING_FEN, engine="mailbox"):
+    """
+    return a board with the Board move api, backed by the given engine.
+    "mailbox" is Board itself, "bitboard" is bitboard.BitboardBoard,
+    "compact" is compact.CompactBoard and "crazyhouse" is
+    crazyhouse_board.CrazyhouseBoard, crazyhouse rules with hands.
+    """
+
+    if engine == "mailbox":
+        return Board(fen)
+    elif engine == "bitboard":
+        from bitboard import BitboardBoard
+
+        return BitboardBoard(fen)
+    elif engine == "compact":
+        from compact import CompactBoard
+
+        return CompactBoard(fen)
+    elif engine == "crazyhouse":
+        from crazyhouse_board import CrazyhouseBoard
+
+        return CrazyhouseBoard(fen)
+    else:
+        raise ValueError(f"unknown engine {engine}")
@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import json
+
+from board import move_to_uci
+from crazyhouse_board import CrazyhouseBoard
+
+# Bughouse over tcp. every line either way is one json object:
+#   -> {"type": "join", "match": id or null, "board": 0 or 1, "color": "w" or "b"}
+#   <- {"type": "joined", "match": id, "board": 0 or 1, "color": "w" or "b"}
+#   -> {"type": "move", "move": "e2e4" or "N@f3"}
+#   <- {"type": "update", "board": 0 or 1, "move": uci, "fens": [fen, fen]}
+#   <- {"type": "result", "winner": team or null, "reason": text}
+#   <- {"type": "left", "board": 0 or 1, "color": "w" or "b"}
+#   <- {"type": "error", "message": text}
+# a match is two crazyhouse boards. white on board 0 and black on board 1 are
+# team 0, the other two team 1. partners get the pieces each other capture.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Longest line a player may send, in bytes
+MAX_LINE_LENGTH = 4096
+
+# Seconds a player may leave messages unread before being dropped
+DRAIN_TIMEOUT = 10
+
+# Every seat of a match, (board index, color)
+SEATS = [(0, "w"), (0, "b"), (1, "w"), (1, "b")]
+
+
+def team(board_index, color):
+    """
+    return the team, 0 or 1, of the player of color on board board_index.
+    """
+
+    return 0 if (board_index == 0) == (color == "w") else 1
+
+
+class Match:
+    """
+    a bughouse match: two headless crazyhouse boards and their four players.
+    a piece captured on one board goes to the partner's hand on the other.
+    """
+
+    def __init__(self, match_id):
+        self.match_id = match_id
+        self.boards = [
+            CrazyhouseBoard(captures_to_hand=False),
+            CrazyhouseBoard(captures_to_hand=False),
+        ]
+
+        # Stream writers of the players by seat
+        self.players = {}
+
+        # Set when all four seats are taken for the first time
+        self.started = False
+
+        # Set when a board is mated, then no more moves are played
+        self.result = None
+
+    def free_seats(self):
+        """
+        return the seats nobody plays yet.
+        """
+
+        return [seat for seat in SEATS if seat not in self.players]
+
+    def play(self, board_index, color, uci):
+        """
+        play the move in uci notation for the player of color on board board_index.
+        return the messages to send every player. raise ValueError if the move
+        can't be played.
+        """
+
+        if self.result is not None:
+            raise ValueError("the match is over")
+        if self.free_seats():
+            raise ValueError("waiting for players")
+
+        board = self.boards[board_index]
+        if board.turn != color:
+            raise ValueError("not your turn")
+
+        moves = {move_to_uci(move): move for move in board.cached_legal_moves()}
+        if uci not in moves:
+            raise ValueError(f"illegal move {uci}")
+        board.make_move(moves[uci])
+
+        # The captured piece goes to the partner, who has the other color
+        # on the other board. promoted pieces go as pawns.
+        captured_piece = None if uci[1] == "@" else board.move_stack[-1][3]
+        if captured_piece is not None:
+            partner_color = "b" if color == "w" else "w"
+            self.boards[1 - board_index].add_captured_to_hand(
+                "p" if captured_piece.promoted else captured_piece.piece_name,
+                partner_color,
+            )
+
+        messages = [
+            {
+                "type": "update",
+                "board": board_index,
+                "move": uci,
+                "fens": [board.fen() for board in self.boards],
+            }
+        ]
+
+        result = board.detect_checkmate()
+        if result == "checkmate":
+            self.result = {
+                "type": "result",
+                "winner": team(board_index, color),
+                "reason": f"checkmate on board {board_index}",
+            }
+        elif result == "stalemate":
+            self.result = {
+                "type": "result",
+                "winner": None,
+                "reason": f"stalemate on board {board_index}",
+            }
+        if self.result is not None:
+            messages.append(self.result)
+        return messages
+
+
+class BughouseServer:
+    """
+    hosts any number of bughouse matches for the players connected to it.
+    every connection is served by its own task, moves never block other games.
+    """
+
+    def __init__(self):
+        self.matches = {}
+        self.next_match_id = 1
+
+    def find_match(self, match_id, seat):
+        """
+        return the match to seat a joining player in: match_id if given, so a
+        player can take over a seat, else the first match waiting for seat,
+        else a new match.
+        """
+
+        if match_id is not None:
+            if match_id not in self.matches:
+                raise ValueError(f"no match {match_id}")
+            return self.matches[match_id]
+
+        for match in self.matches.values():
+            if not match.started and seat in match.free_seats():
+                return match
+
+        match = Match(self.next_match_id)
+        self.matches[match.match_id] = match
+        self.next_match_id += 1
+        return match
+
+    def send(self, writer, message):
+        """
+        queue one message for one player.
+        """
+
+        writer.write((json.dumps(message) + "\n").encode())
+
+    async def broadcast(self, match, messages):
+        """
+        send messages to every player of match and wait until all of them
+        took them.
+        """
+
+        data = "".join(json.dumps(message) + "\n" for message in messages).encode()
+        writers = list(match.players.values())
+        for writer in writers:
+            writer.write(data)
+        await asyncio.gather(*(self.drain(writer) for writer in writers))
+
+    async def drain(self, writer):
+        """
+        wait until the messages queued for writer are sent. a player that
+        doesn't read them in DRAIN_TIMEOUT seconds is disconnected, so its
+        buffer can't grow without bound.
+        """
+
+        try:
+            await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            writer.transport.abort()
+
+    async def handle_connection(self, reader, writer):
+        """
+        serve one player until the connection closes.
+        """
+
+        match = None
+        seat = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_LINE_LENGTH, the stream skipped it
+                    self.send(writer, {"type": "error", "message": "line too long"})
+                    await self.drain(writer)
+                    continue
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    if request.get("type") == "join" and match is None:
+                        seat = (request.get("board", 0), request.get("color", "w"))
+                        if seat not in SEATS:
+                            raise ValueError(f"no seat {seat}")
+                        joined_match = self.find_match(request.get("match"), seat)
+                        if seat not in joined_match.free_seats():
+                            raise ValueError("seat taken")
+                        match = joined_match
+                        match.players[seat] = writer
+                        if not match.free_seats():
+                            match.started = True
+                        self.send(
+                            writer,
+                            {
+                                "type": "joined",
+                                "match": match.match_id,
+                                "board": seat[0],
+                                "color": seat[1],
+                            },
+                        )
+                    elif request.get("type") == "move" and match is not None:
+                        messages = match.play(seat[0], seat[1], request.get("move"))
+                        if match.result is not None:
+                            self.matches.pop(match.match_id, None)
+                        await self.broadcast(match, messages)
+                    else:
+                        raise ValueError("unexpected message")
+                except (ValueError, TypeError, AttributeError) as error:
+                    self.send(writer, {"type": "error", "message": str(error)})
+
+                await self.drain(writer)
+        except ConnectionError:
+            pass
+        finally:
+            if match is not None and match.players.get(seat) is writer:
+                del match.players[seat]
+                if not match.players:
+                    self.matches.pop(match.match_id, None)
+                await self.broadcast(
+                    match, [{"type": "left", "board": seat[0], "color": seat[1]}]
+                )
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        accept players on host and port until cancelled.
+        """
+
+        server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE_LENGTH
+        )
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bughouse server, json lines over tcp")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    arguments = parser.parse_args()
+
+    asyncio.run(BughouseServer().serve(arguments.host, arguments.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,707 @@
-import copy
-from chess import Chessboard
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from board import STARTING_FEN, create_board
+from transposition import (
+    EXACT,
+    LOWER_BOUND,
+    UPPER_BOUND,
+    TranspositionTable,
+    shared_buffer,
+)
+
+# Score of being mated right now, mates further away score closer to zero
+MATE_SCORE = 100000
+
+# Scores above this are mates, found by the search rather than the evaluation
+MATE_THRESHOLD = MATE_SCORE - 1000
+
+# Deepest iteration search() runs when it has no depth limit
+MAX_DEPTH = 64
+
+# Nodes searched between clock checks
+TIME_CHECK_INTERVAL = 1024
+
+# Proof or disproof number of a node that is settled the other way
+PROOF_INFINITY = 10**9
+
+PIECE_VALUES = {"p": 100, "n": 320, "b": 330, "r": 500, "q": 900, "k": 0}
+
+# Piece square bonuses for white, [row][column] with row 0 black's back rank.
+# black uses the same tables flipped vertically.
+PIECE_SQUARE_BONUSES = {
+    "p": [
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [50, 50, 50, 50, 50, 50, 50, 50],
+        [10, 10, 20, 30, 30, 20, 10, 10],
+        [5, 5, 10, 25, 25, 10, 5, 5],
+        [0, 0, 0, 20, 20, 0, 0, 0],
+        [5, -5, -10, 0, 0, -10, -5, 5],
+        [5, 10, 10, -20, -20, 10, 10, 5],
+        [0, 0, 0, 0, 0, 0, 0, 0],
+    ],
+    "n": [
+        [-50, -40, -30, -30, -30, -30, -40, -50],
+        [-40, -20, 0, 0, 0, 0, -20, -40],
+        [-30, 0, 10, 15, 15, 10, 0, -30],
+        [-30, 5, 15, 20, 20, 15, 5, -30],
+        [-30, 0, 15, 20, 20, 15, 0, -30],
+        [-30, 5, 10, 15, 15, 10, 5, -30],
+        [-40, -20, 0, 5, 5, 0, -20, -40],
+        [-50, -40, -30, -30, -30, -30, -40, -50],
+    ],
+    "b": [
+        [-20, -10, -10, -10, -10, -10, -10, -20],
+        [-10, 0, 0, 0, 0, 0, 0, -10],
+        [-10, 0, 5, 10, 10, 5, 0, -10],
+        [-10, 5, 5, 10, 10, 5, 5, -10],
+        [-10, 0, 10, 10, 10, 10, 0, -10],
+        [-10, 10, 10, 10, 10, 10, 10, -10],
+        [-10, 5, 0, 0, 0, 0, 5, -10],
+        [-20, -10, -10, -10, -10, -10, -10, -20],
+    ],
+    "r": [
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [5, 10, 10, 10, 10, 10, 10, 5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [0, 0, 0, 5, 5, 0, 0, 0],
+    ],
+    "q": [
+        [-20, -10, -10, -5, -5, -10, -10, -20],
+        [-10, 0, 0, 0, 0, 0, 0, -10],
+        [-10, 0, 5, 5, 5, 5, 0, -10],
+        [-5, 0, 5, 5, 5, 5, 0, -5],
+        [0, 0, 5, 5, 5, 5, 0, -5],
+        [-10, 5, 5, 5, 5, 5, 0, -10],
+        [-10, 0, 5, 0, 0, 0, 0, -10],
+        [-20, -10, -10, -5, -5, -10, -10, -20],
+    ],
+    "k": [
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-20, -30, -30, -40, -40, -30, -30, -20],
+        [-10, -20, -20, -20, -20, -20, -20, -10],
+        [20, 20, 0, 0, 0, 0, 20, 20],
+        [20, 30, 10, 0, 0, 10, 30, 20],
+    ],
+}
+
+# Value plus bonus for every piece on every square, positive for white,
+# ["wq"][row * 8 + column]
+PIECE_SQUARE_SCORES = {}
+for _piece_name, _bonuses in PIECE_SQUARE_BONUSES.items():
+    _value = PIECE_VALUES[_piece_name]
+    PIECE_SQUARE_SCORES["w" + _piece_name] = [
+        _value + _bonuses[row][column] for row in range(8) for column in range(8)
+    ]
+    PIECE_SQUARE_SCORES["b" + _piece_name] = [
+        -_value - _bonuses[7 - row][column] for row in range(8) for column in range(8)
+    ]
+
+
+def evaluate(board):
+    """
+    return material and piece square score of the position, from the point of
+    view of the side to move.
+    """
+
+    score = 0
+    for square in range(64):
+        piece = board.piece_at((square // 8, square % 8))
+        if piece is not None:
+            score += PIECE_SQUARE_SCORES[piece][square]
+
+    # Crazyhouse hand pieces, worth as much as on the board
+    hand_amounts = getattr(board, "bughouse_hand_amounts", None)
+    if hand_amounts is not None:
+        for piece_name, black_amount, white_amount in zip(
+            board.bughouse_hand_names, *hand_amounts
+        ):
+            score += (white_amount - black_amount) * PIECE_VALUES[piece_name]
+
+    return score if board.turn == "w" else -score
+
+
+def captured_piece(board, move):
+    """
+    return name of the piece move captures, or None. en passant takes a pawn,
+    crazyhouse drops take nothing.
+    """
+
+    from_location, target_location, _ = move
+    piece = board.piece_at(target_location)
+    if piece is not None:
+        return piece[1]
+    if (
+        from_location is not None
+        and from_location[1] != target_location[1]
+        and board.piece_at(from_location)[1] == "p"
+    ):
+        return "p"
+    return None
+
+
+class ProofNode:
+    """
+    node of the proof number search tree. or nodes have the attacker to move,
+    and nodes the defender. proof is how many leaves still have to be proven
+    to prove a mate, disproof how many to rule it out.
+    """
+
+    __slots__ = (
+        "move",
+        "parent",
+        "children",
+        "attacker_to_move",
+        "moves_left",
+        "proof",
+        "disproof",
+    )
+
+    def __init__(self, move, parent, attacker_to_move, moves_left):
+        self.move = move
+        self.parent = parent
+        self.children = None
+        self.attacker_to_move = attacker_to_move
+
+        # Attacker moves left to deliver mate
+        self.moves_left = moves_left
+
+        self.proof = 1
+        self.disproof = 1
+
+    def update(self):
+        """
+        recompute proof and disproof numbers from the children.
+        """
+
+        if self.attacker_to_move:
+            self.proof = min(child.proof for child in self.children)
+            self.disproof = min(
+                sum(child.disproof for child in self.children), PROOF_INFINITY
+            )
+        else:
+            self.proof = min(
+                sum(child.proof for child in self.children), PROOF_INFINITY
+            )
+            self.disproof = min(child.disproof for child in self.children)
+
+    def mate_length(self):
+        """
+        return plies to mate below a proven node, the attacker taking the
+        fastest mate and the defender the slowest.
+        """
+
+        if self.children is None:
+            return 0
+        if self.attacker_to_move:
+            return 1 + min(
+                child.mate_length() for child in self.children if child.proof == 0
+            )
+        return 1 + max(child.mate_length() for child in self.children)
+
 
 class Chessbot:
-    def __init__(self):
-        self.fen = "rnbqkbnr/ppppp2p/8/8/8/8/PPPP1PPP/RNBQKBNR"
-        self.original_chessboard = Chessboard(self.fen)
-        
+    def __init__(
+        self,
+        fen=STARTING_FEN,
+        engine="bitboard",
+        hash_size_mb=16,
+        workers=1,
+        hash_buffer=None,
+    ):
+        self.engine = engine
+        self.chessboard = create_board(fen, engine)
+
+        # Searching with more than one worker runs them in their own processes,
+        # all reading and filling one hash table in shared memory
+        self.workers = workers
+        self.hash_size_mb = hash_size_mb
+        self.executor = None
+        if workers > 1 and hash_buffer is None:
+            hash_buffer = shared_buffer(hash_size_mb)
+        self.hash_buffer = hash_buffer
+
+        # Search results by position hash, shared by every search of this bot
+        self.transposition_table = TranspositionTable(hash_size_mb, hash_buffer)
+
+        # Quiet moves that caused a cutoff, two per ply
+        self.killer_moves = [[None, None] for _ in range(MAX_DEPTH + 1)]
+
+        # Principal variation found below each ply by the last search
+        self.pv_table = [[] for _ in range(MAX_DEPTH + 1)]
+
+        # Hashes of the positions on the path from the root, for repetitions
+        self.path_hashes = []
+
+        # Search budget, and the deepest iteration the last search finished
+        self.completed_depth = 0
+        self.nodes = 0
+        self.node_limit = None
+        self.deadline = None
+        self.stopped = False
+
+    def set_fen(self, fen):
+        """
+        search the position of fen string from now on. the hash table is kept,
+        its entries are keyed by position and stay valid.
+        """
+
+        self.chessboard = create_board(fen, self.engine)
 
     def find_mateinone(self):
+        """
+        return a move that mates right away, or None.
+        """
+
+        # play every move on the board, look for mate, take it back
+        for move in self.chessboard.legal_moves():
+            self.chessboard.make_move(move)
+            mate = self.chessboard.detect_checkmate() == "checkmate"
+            self.chessboard.unmake_move()
+            if mate:
+                return move
+        return None
+
+    def find_mate(self, max_depth, max_nodes=200000):
+        """
+        look for a forced mate in at most max_depth moves with proof number search.
+        return the shortest mating line as a list of moves, or None if there is
+        no such mate or max_nodes positions were not enough to decide.
+        """
+
+        # Already mated or stalemated, there is no move to search
+        if not self.chessboard.legal_moves():
+            return None
+
+        # Shorter mates first, they are cheap to rule out
+        nodes = 0
+        for depth in range(1, max_depth + 1):
+            line, depth_nodes = self.prove_mate(depth, max_nodes - nodes)
+            if line is not None:
+                return line
+            nodes += depth_nodes
+            if nodes >= max_nodes:
+                break
+        return None
+
+    def prove_mate(self, depth, max_nodes):
+        """
+        run one proof number search for a mate in depth moves.
+        return (mating line or None, positions looked at).
+        """
+
+        board = self.chessboard
+        root = ProofNode(None, None, True, depth)
 
-        # create temporary own pieces and enemy pieces lists
-        own_pieces = []
-        enemy_pieces = []
-        for row in self.original_chessboard.current_position:
-            for some_piece in row:
-                if some_piece != None:
-                    if some_piece.color == self.original_chessboard.turn:
-                        own_pieces.append(some_piece)
+        nodes = 0
+        while root.proof and root.disproof and nodes < max_nodes:
+            # Walk down to the most proving node
+            node = root
+            while node.children is not None:
+                if node.attacker_to_move:
+                    node = min(node.children, key=lambda child: child.proof)
+                else:
+                    node = min(node.children, key=lambda child: child.disproof)
+                board.make_move(node.move)
+
+            nodes += self.expand_proof_node(node)
+
+            # Back up the new numbers to the root
+            while node is not root:
+                node.update()
+                board.unmake_move()
+                node = node.parent
+            root.update()
+
+        if root.proof:
+            return None, nodes
+
+        # Follow the fastest mate against the most stubborn defence
+        line = []
+        node = root
+        while node.children is not None:
+            if node.attacker_to_move:
+                proven = [child for child in node.children if child.proof == 0]
+                node = min(proven, key=ProofNode.mate_length)
+            else:
+                node = max(node.children, key=ProofNode.mate_length)
+            line.append(node.move)
+        return line, nodes
+
+    def expand_proof_node(self, node):
+        """
+        add children for every legal move of node's position, which is the
+        position on the board, and set their proof numbers.
+        return the number of positions looked at.
+        """
+
+        board = self.chessboard
+        node.children = []
+        checks = []
+        quiet = []
+
+        for move in board.legal_moves():
+            board.make_move(move)
+            in_check = board.is_check()
+            child = ProofNode(
+                move,
+                node,
+                not node.attacker_to_move,
+                node.moves_left - 1 if node.attacker_to_move else node.moves_left,
+            )
+
+            # Out of attacker moves, only a mate can still prove it
+            if node.attacker_to_move and child.moves_left == 0 and not in_check:
+                child.proof, child.disproof = PROOF_INFINITY, 0
+            else:
+                replies = len(board.legal_moves())
+                if replies == 0:
+                    if in_check and node.attacker_to_move:
+                        child.proof, child.disproof = 0, PROOF_INFINITY
                     else:
-                        enemy_pieces.append(some_piece)
+                        child.proof, child.disproof = PROOF_INFINITY, 0
+                elif node.attacker_to_move:
+                    if child.moves_left == 0:
+                        child.proof, child.disproof = PROOF_INFINITY, 0
+                    else:
+                        # Fewer replies, nearer to a proof
+                        child.proof, child.disproof = replies, 1
                 else:
-                    pass
-        
-        all_moves = []
-        # find all legal moves for each piece
-        for some_piece in own_pieces:
-            self.original_chessboard.selected_piece = some_piece
-
-            some_piece_moves = some_piece.show_legal_moves(
-                self.original_chessboard.current_position, self.original_chessboard.previous_move, strict=True
+                    child.proof, child.disproof = 1, replies
+            board.unmake_move()
+
+            (checks if in_check else quiet).append(child)
+
+            # One proven attacker move is enough
+            if node.attacker_to_move and child.proof == 0:
+                break
+
+        # Checks first, ties in proof numbers pick the earlier child
+        node.children = checks + quiet
+        node.update()
+        return len(node.children)
+
+    def search(self, depth=None, movetime=None, nodes=None, first_depth=1):
+        """
+        search the position with iterative deepening until depth, movetime
+        seconds or nodes run out, whichever comes first. without any limit it
+        searches to depth 4. iterations start at first_depth.
+        return (best_move, score, pv), score in centipawns for the side to move.
+        """
+
+        if depth is None:
+            depth = MAX_DEPTH if movetime or nodes else 4
+        depth = min(depth, MAX_DEPTH)
+
+        if self.workers > 1:
+            return self.parallel_search(depth, movetime, nodes)
+
+        self.completed_depth = 0
+        self.nodes = 0
+        self.node_limit = nodes
+        self.deadline = time.perf_counter() + movetime if movetime else None
+        self.stopped = False
+        self.killer_moves = [[None, None] for _ in range(MAX_DEPTH + 1)]
+        self.path_hashes = []
+
+        best_move = None
+        best_score = 0
+        best_pv = []
+
+        for iteration_depth in range(min(first_depth, depth), depth + 1):
+            score = self.negamax(iteration_depth, -MATE_SCORE, MATE_SCORE, 0)
+
+            # An interrupted iteration still beat the others with the moves it finished
+            if self.stopped:
+                if self.pv_table[0]:
+                    best_pv = list(self.pv_table[0])
+                    best_move = best_pv[0]
+                break
+
+            best_score = score
+            best_pv = list(self.pv_table[0])
+            best_move = best_pv[0] if best_pv else None
+            self.completed_depth = iteration_depth
+
+            # No need to look deeper once a forced mate is found
+            if abs(score) >= MATE_THRESHOLD:
+                break
+
+        # Out of budget before the first move finished
+        if best_move is None:
+            moves = self.chessboard.legal_moves()
+            if moves:
+                best_move = moves[0]
+                best_pv = [best_move]
+
+        return best_move, best_score, best_pv
+
+    def parallel_search(self, depth, movetime, nodes):
+        """
+        lazy smp: every worker process searches the same position with the
+        shared hash table, so each one finds results the others stored. half of
+        them start one iteration deeper to spread the work. the deepest finished
+        search gives the result, nodes is a budget per worker.
+        return (best_move, score, pv) like search.
+        """
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=start_helper,
+                initargs=(self.engine, self.hash_size_mb, self.hash_buffer),
             )
 
-            print(some_piece.piece_name, some_piece_moves)
-            all_moves.extend([(some_piece, move) for move in some_piece_moves])
-        
-        for move in all_moves:
-            temporary_chessboard = Chessboard(self.f)
-            temporary_chessboard.selected_piece = move[0]
-            temporary_chessboard.make_move(move[1])
-            temporary_chessboard.detect_checkmate()
-
-bot = Chessbot()
-bot.find_mateinone()
\ No newline at end of file
+        fen = self.chessboard.fen()
+        futures = [
+            self.executor.submit(
+                helper_search, fen, depth, movetime, nodes, 1 + worker % 2
+            )
+            for worker in range(self.workers)
+        ]
+        results = [future.result() for future in futures]
+
+        self.nodes = sum(result[4] for result in results)
+        best_move, score, pv, self.completed_depth, _ = max(
+            results, key=lambda result: result[3]
+        )
+        return best_move, score, pv
+
+    def close(self):
+        """
+        stop the worker processes of parallel searches.
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def out_of_budget(self):
+        """
+        check the node and time budget, and stop the search if it is spent.
+        """
+
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            self.stopped = True
+        elif (
+            self.deadline is not None
+            and self.nodes % TIME_CHECK_INTERVAL == 0
+            and time.perf_counter() >= self.deadline
+        ):
+            self.stopped = True
+        return self.stopped
+
+    def order_moves(self, moves, hash_move=None, killers=(None, None)):
+        """
+        sort moves best first: hash move, captures by most valuable victim and
+        least valuable attacker, killer moves, then the rest.
+        """
+
+        board = self.chessboard
+
+        def move_priority(move):
+            if move == hash_move:
+                return 100000
+            victim = captured_piece(board, move)
+            if victim is not None:
+                attacker = board.piece_at(move[0])[1]
+                return 10000 + 10 * PIECE_VALUES[victim] - PIECE_VALUES[attacker] // 10
+            if move[2] is not None and move[0] is not None:
+                return 9000 + PIECE_VALUES[move[2]]
+            if move == killers[0]:
+                return 8000
+            if move == killers[1]:
+                return 7000
+            return 0
+
+        moves.sort(key=move_priority, reverse=True)
+        return moves
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        return score of the position for the side to move, searched depth plies
+        deep with alpha-beta pruning. fills self.pv_table[ply].
+        """
+
+        board = self.chessboard
+        self.pv_table[ply] = []
+
+        self.nodes += 1
+        if self.out_of_budget():
+            return 0
+
+        # Repetitions on the path count as draws
+        if ply > 0 and board.hash in self.path_hashes:
+            return 0
+
+        in_check = board.is_check()
+        if in_check and ply < MAX_DEPTH:
+            depth += 1
+
+        if depth <= 0 or ply >= MAX_DEPTH:
+            return self.quiescence(alpha, beta, ply)
+
+        # Hash table cutoffs, never at the root so a move is always returned
+        hash_move = None
+        entry = self.transposition_table.probe(board.hash)
+        if entry is not None:
+            entry_depth, bound, entry_score, hash_move = entry
+            entry_score = score_from_table(entry_score, ply)
+            if ply > 0 and entry_depth >= depth:
+                if (
+                    bound == EXACT
+                    or (bound == LOWER_BOUND and entry_score >= beta)
+                    or (bound == UPPER_BOUND and entry_score <= alpha)
+                ):
+                    return entry_score
+
+        moves = board.legal_moves()
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE
+        best_move = None
+
+        self.path_hashes.append(board.hash)
+        for move in self.order_moves(moves, hash_move, self.killer_moves[ply]):
+            board.make_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if self.stopped:
+                self.path_hashes.pop()
+                return 0
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+                    if alpha >= beta:
+                        # Quiet moves become killers, crazyhouse drops too
+                        if captured_piece(board, move) is None and (
+                            move[2] is None or move[0] is None
+                        ):
+                            killers = self.killer_moves[ply]
+                            if move != killers[0]:
+                                killers[1] = killers[0]
+                                killers[0] = move
+                        break
+        self.path_hashes.pop()
+
+        if best_score >= beta:
+            bound = LOWER_BOUND
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.transposition_table.store(
+            board.hash, depth, bound, score_to_table(best_score, ply), best_move
+        )
+        return best_score
+
+    def quiescence(self, alpha, beta, ply):
+        """
+        return score of the position searching only captures and promotions,
+        so the evaluation never stops in the middle of an exchange.
+        """
+
+        board = self.chessboard
+
+        self.nodes += 1
+        if self.out_of_budget():
+            return 0
+
+        stand_pat = evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        moves = [
+            move
+            for move in board.legal_moves()
+            if (move[2] == "q" and move[0] is not None)
+            or captured_piece(board, move) is not None
+        ]
+        for move in self.order_moves(moves):
+            board.make_move(move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if self.stopped:
+                return 0
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+
+# The bot of a parallel search worker process, on the shared hash table
+_helper_bot = None
+
+
+def start_helper(engine, hash_size_mb, hash_buffer):
+    """
+    create the bot of a parallel search worker process.
+    """
+
+    global _helper_bot
+    _helper_bot = Chessbot(
+        engine=engine, hash_size_mb=hash_size_mb, hash_buffer=hash_buffer
+    )
+
+
+def helper_search(fen, depth, movetime, nodes, first_depth):
+    """
+    search fen in a worker process.
+    return (best_move, score, pv, completed depth, nodes).
+    """
+
+    _helper_bot.set_fen(fen)
+    best_move, score, pv = _helper_bot.search(depth, movetime, nodes, first_depth)
+    return best_move, score, pv, _helper_bot.completed_depth, _helper_bot.nodes
+
+
+def score_to_table(score, ply):
+    """
+    return score with mates counted from this position instead of the root.
+    """
+
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """
+    return a stored score with mates counted from the root again.
+    """
+
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+if __name__ == "__main__":
+    bot = Chessbot("rnbqkbnr/ppppp2p/8/8/8/8/PPPP1PPP/RNBQKBNR")
+    print("mate in one:", bot.find_mateinone())
+
+    print("forced mate:", bot.find_mate(3))
+
+    best_move, score, pv = bot.search(movetime=5)
+    print("best move:", best_move, "score:", score, "pv:", pv)
@@ -0,0 +1,532 @@
+from array import array
+
+from board import STARTING_FEN, PROMOTION_NAMES, Piece
+from bitboard import (
+    PIECE_NAMES,
+    PAWN,
+    KNIGHT,
+    BISHOP,
+    ROOK,
+    QUEEN,
+    KING,
+    WHITE,
+    BLACK,
+    COLOR_NAMES,
+    CODE_NAMES,
+    SQUARE_LOCATIONS,
+)
+from fen import parse_fen, format_fen
+from zobrist import PIECE_CODE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, SIDE_KEY
+from tables import (
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+    CASTLING_MASKS,
+    KNIGHT_SQUARES,
+    KING_SQUARES,
+    PAWN_CAPTURE_SQUARES,
+    DIAGONAL_RAY_SQUARES,
+    STRAIGHT_RAY_SQUARES,
+)
+
+# A position is one array of 64 signed bytes, the piece code on every square
+# (color * 6 + piece type like bitboard.py, -1 empty) plus a few ints. copying
+# it copies one buffer, and Piece objects are only made when the gui asks.
+
+
+def square_indexes(table):
+    """
+    return the [row][column] table of (row, col) lists as [square] lists of square indexes.
+    """
+
+    return [
+        [row * 8 + column for row, column in table[square // 8][square % 8]]
+        for square in range(64)
+    ]
+
+
+def ray_indexes(table):
+    """
+    return the [row][column] table of rays as [square] lists of square index rays.
+    """
+
+    return [
+        [
+            [row * 8 + column for row, column in ray]
+            for ray in table[square // 8][square % 8]
+        ]
+        for square in range(64)
+    ]
+
+
+KNIGHT_TARGETS = square_indexes(KNIGHT_SQUARES)
+KING_TARGETS = square_indexes(KING_SQUARES)
+
+# Squares attacked by a pawn of each color, index 0 white and 1 black
+PAWN_CAPTURE_TARGETS = [
+    square_indexes(PAWN_CAPTURE_SQUARES["w"]),
+    square_indexes(PAWN_CAPTURE_SQUARES["b"]),
+]
+DIAGONAL_RAYS = ray_indexes(DIAGONAL_RAY_SQUARES)
+STRAIGHT_RAYS = ray_indexes(STRAIGHT_RAY_SQUARES)
+QUEEN_RAYS = [DIAGONAL_RAYS[square] + STRAIGHT_RAYS[square] for square in range(64)]
+
+# Squares sharing a line with each square, only pieces on them can be pinned to a king there
+ALIGNED_SQUARES = [
+    {target for ray in QUEEN_RAYS[square] for target in ray} for square in range(64)
+]
+
+
+class CompactBoard:
+    """
+    array backed position: 64 piece codes in an array('b') plus int state.
+    same move api as Board, moves are (from_location, target_location, promotion).
+    """
+
+    def set_fen(self, fen):
+        """
+        load position from fen string. missing fields default to white to move,
+        castling wherever king and rook stand on their starting squares, no en passant.
+        """
+
+        (
+            self.squares,
+            self.side,
+            self.castling_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.fullmove_number,
+            self.hash,
+        ) = parse_fen(fen)
+
+    def fen(self):
+        """
+        return the fen string of the position.
+        """
+
+        return format_fen(
+            self.squares,
+            self.side,
+            self.castling_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.fullmove_number,
+        )
+
+    def __init__(self, fen=STARTING_FEN):
+        self.set_fen(fen)
+
+        # Undo records of the moves made, newest last
+        self.move_stack = []
+
+    def copy(self):
+        """
+        return a copy of the position, without the move history.
+        """
+
+        board = CompactBoard.__new__(CompactBoard)
+        board.squares = array("b", self.squares)
+        board.side = self.side
+        board.castling_rights = self.castling_rights
+        board.en_passant = self.en_passant
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        board.hash = self.hash
+        board.move_stack = []
+        return board
+
+    def compute_hash(self):
+        """
+        return the zobrist hash of the position, computed from scratch.
+        make_move and unmake_move keep self.hash up to date without this.
+        """
+
+        zobrist_hash = 0
+        for square, code in enumerate(self.squares):
+            if code >= 0:
+                zobrist_hash ^= PIECE_CODE_KEYS[code][square]
+
+        zobrist_hash ^= CASTLING_KEYS[self.castling_rights]
+        if self.en_passant >= 0:
+            zobrist_hash ^= EN_PASSANT_KEYS[self.en_passant % 8]
+        if self.side == BLACK:
+            zobrist_hash ^= SIDE_KEY
+        return zobrist_hash
+
+    @property
+    def turn(self):
+        return COLOR_NAMES[self.side]
+
+    def attacked(self, square, by_side):
+        """
+        check if square index is attacked by by_side (WHITE or BLACK).
+        probes outward from the square like board.is_square_attacked.
+        """
+
+        squares = self.squares
+        base = by_side * 6
+
+        knight = base + KNIGHT
+        for target in KNIGHT_TARGETS[square]:
+            if squares[target] == knight:
+                return True
+
+        # a pawn attacks square if a pawn of the other color on square would attack it
+        pawn = base + PAWN
+        for target in PAWN_CAPTURE_TARGETS[1 - by_side][square]:
+            if squares[target] == pawn:
+                return True
+
+        king = base + KING
+        for target in KING_TARGETS[square]:
+            if squares[target] == king:
+                return True
+
+        queen = base + QUEEN
+        for rays, slider in (
+            (DIAGONAL_RAYS, base + BISHOP),
+            (STRAIGHT_RAYS, base + ROOK),
+        ):
+            for ray in rays[square]:
+                for target in ray:
+                    code = squares[target]
+                    if code >= 0:
+                        if code == slider or code == queen:
+                            return True
+                        break
+        return False
+
+    def is_square_attacked(self, square, by_color):
+        """
+        check if a piece of by_color attacks square (row, col).
+        """
+
+        row, column = square
+        return self.attacked(row * 8 + column, COLOR_NAMES.index(by_color))
+
+    def piece_at(self, location):
+        """
+        return color and name of the piece on location (row, col), like "wq", or None.
+        """
+
+        code = self.squares[location[0] * 8 + location[1]]
+        return None if code < 0 else CODE_NAMES[code]
+
+    def piece_grid(self):
+        """
+        return the position as an 8x8 list of Piece objects, for drawing.
+        kings and rooks that lost their castling rights count as moved.
+        """
+
+        unmoved = set()
+        for right, king_square, rook_square in [
+            (WHITE_KINGSIDE, 60, 63),
+            (WHITE_QUEENSIDE, 60, 56),
+            (BLACK_KINGSIDE, 4, 7),
+            (BLACK_QUEENSIDE, 4, 0),
+        ]:
+            if self.castling_rights & right:
+                unmoved.add(king_square)
+                unmoved.add(rook_square)
+
+        grid = [[None] * 8 for _ in range(8)]
+        for square, code in enumerate(self.squares):
+            if code >= 0:
+                row, column = SQUARE_LOCATIONS[square]
+                piece = Piece(
+                    COLOR_NAMES[code // 6], PIECE_NAMES[code % 6], row, column
+                )
+                piece.has_moved = code % 6 in (KING, ROOK) and square not in unmoved
+                grid[row][column] = piece
+        return grid
+
+    def king_square(self, side):
+        return self.squares.index(side * 6 + KING)
+
+    def is_check(self):
+        """
+        check if the king of the side to move is attacked.
+        """
+
+        return self.attacked(self.king_square(self.side), 1 - self.side)
+
+    def pseudo_legal_moves(self):
+        """
+        return moves as (from_square, target_square, promotion) ignoring king safety.
+        """
+
+        moves = []
+        squares = self.squares
+        side = self.side
+        base = side * 6
+        enemy_base = (1 - side) * 6
+
+        if side == WHITE:
+            forward, start_row, promotion_row = -8, 6, 0
+        else:
+            forward, start_row, promotion_row = 8, 1, 7
+
+        for square in range(64):
+            code = squares[square]
+            if code < base or code >= base + 6:
+                continue
+            piece_type = code - base
+
+            if piece_type == PAWN:
+                targets = []
+                push = square + forward
+                if squares[push] < 0:
+                    targets.append(push)
+                    if square // 8 == start_row and squares[push + forward] < 0:
+                        targets.append(push + forward)
+                for target in PAWN_CAPTURE_TARGETS[side][square]:
+                    captured = squares[target]
+                    if (
+                        enemy_base <= captured < enemy_base + 6
+                        or target == self.en_passant
+                    ):
+                        targets.append(target)
+
+                for target in targets:
+                    if target // 8 == promotion_row:
+                        for promotion in PROMOTION_NAMES:
+                            moves.append((square, target, promotion))
+                    else:
+                        moves.append((square, target, None))
+
+            elif piece_type == KNIGHT or piece_type == KING:
+                table = KNIGHT_TARGETS if piece_type == KNIGHT else KING_TARGETS
+                for target in table[square]:
+                    captured = squares[target]
+                    if captured < base or captured >= base + 6:
+                        moves.append((square, target, None))
+
+            # Sliders, along each ray up to the first piece
+            else:
+                if piece_type == BISHOP:
+                    rays = DIAGONAL_RAYS[square]
+                elif piece_type == ROOK:
+                    rays = STRAIGHT_RAYS[square]
+                else:
+                    rays = QUEEN_RAYS[square]
+                for ray in rays:
+                    for target in ray:
+                        captured = squares[target]
+                        if captured < 0:
+                            moves.append((square, target, None))
+                        else:
+                            if captured < base or captured >= base + 6:
+                                moves.append((square, target, None))
+                            break
+
+        # Castling, king and rook on their starting squares, king and passed
+        # square not attacked, the target is checked with the other moves
+        if side == WHITE:
+            castles = [
+                (WHITE_KINGSIDE, 60, 63, 62, 61, (61, 62)),
+                (WHITE_QUEENSIDE, 60, 56, 58, 59, (57, 58, 59)),
+            ]
+        else:
+            castles = [
+                (BLACK_KINGSIDE, 4, 7, 6, 5, (5, 6)),
+                (BLACK_QUEENSIDE, 4, 0, 2, 3, (1, 2, 3)),
+            ]
+        for right, king_square, rook_square, target, passed_square, between in castles:
+            if (
+                self.castling_rights & right
+                and squares[king_square] == base + KING
+                and squares[rook_square] == base + ROOK
+                and all(squares[between_square] < 0 for between_square in between)
+                and not self.attacked(king_square, 1 - side)
+                and not self.attacked(passed_square, 1 - side)
+            ):
+                moves.append((king_square, target, None))
+
+        return moves
+
+    def legal_moves(self):
+        """
+        return all legal moves for the side to move as (from_location, target_location, promotion).
+        """
+
+        side = self.side
+        king_square = self.king_square(side)
+        in_check = self.attacked(king_square, 1 - side)
+        aligned = ALIGNED_SQUARES[king_square]
+
+        moves = []
+        for square, target, promotion in self.pseudo_legal_moves():
+            # Moves that can't expose the king need no test
+            if (
+                not in_check
+                and square != king_square
+                and square not in aligned
+                and target != self.en_passant
+            ):
+                moves.append(
+                    (SQUARE_LOCATIONS[square], SQUARE_LOCATIONS[target], promotion)
+                )
+                continue
+
+            self.make_square_move(square, target, promotion)
+            if not self.attacked(
+                target if square == king_square else king_square, 1 - side
+            ):
+                moves.append(
+                    (SQUARE_LOCATIONS[square], SQUARE_LOCATIONS[target], promotion)
+                )
+            self.unmake_move()
+
+        return moves
+
+    def detect_checkmate(self):
+        """
+        check if current player is mated.
+        return "checkmate", "stalemate" or None.
+        """
+
+        if self.legal_moves():
+            return None
+        if self.is_check():
+            return "checkmate"
+        else:
+            return "stalemate"
+
+    def make_move(self, move):
+        """
+        make the move in place and push an undo record for unmake_move.
+        move is (from_location, target_location, promotion) as returned by legal_moves.
+        """
+
+        (from_row, from_column), (target_row, target_column), promotion = move
+        self.make_square_move(
+            from_row * 8 + from_column, target_row * 8 + target_column, promotion
+        )
+
+    def make_square_move(self, square, target, promotion=None):
+        """
+        make_move with square indexes.
+        """
+
+        squares = self.squares
+        side = self.side
+
+        piece = squares[square]
+        captured = squares[target]
+        piece_type = piece - side * 6
+
+        # Undo record: squares, moved and captured piece, and the irreversible state
+        self.move_stack.append(
+            (
+                square,
+                target,
+                piece,
+                captured,
+                self.castling_rights,
+                self.en_passant,
+                self.halfmove_clock,
+                self.hash,
+            )
+        )
+
+        zobrist_hash = (
+            self.hash ^ PIECE_CODE_KEYS[piece][square] ^ PIECE_CODE_KEYS[piece][target]
+        )
+        if captured >= 0:
+            zobrist_hash ^= PIECE_CODE_KEYS[captured][target]
+        if self.en_passant >= 0:
+            zobrist_hash ^= EN_PASSANT_KEYS[self.en_passant % 8]
+
+        squares[square] = -1
+        squares[target] = piece
+
+        en_passant = -1
+        if piece_type == PAWN:
+            # En passant, the captured pawn stands behind the target square
+            if target == self.en_passant:
+                captured_square = target + 8 if side == WHITE else target - 8
+                captured = squares[captured_square]
+                squares[captured_square] = -1
+                zobrist_hash ^= PIECE_CODE_KEYS[captured][captured_square]
+
+            elif promotion:
+                promoted = side * 6 + PIECE_NAMES.index(promotion)
+                squares[target] = promoted
+                zobrist_hash ^= (
+                    PIECE_CODE_KEYS[piece][target] ^ PIECE_CODE_KEYS[promoted][target]
+                )
+
+            elif target - square == 16 or square - target == 16:
+                en_passant = (square + target) // 2
+                zobrist_hash ^= EN_PASSANT_KEYS[en_passant % 8]
+
+        # Castling, move the rook too
+        elif piece_type == KING and (target - square == 2 or square - target == 2):
+            if target > square:
+                rook_square, rook_target = square + 3, square + 1
+            else:
+                rook_square, rook_target = square - 4, square - 1
+            rook = side * 6 + ROOK
+            squares[rook_square] = -1
+            squares[rook_target] = rook
+            zobrist_hash ^= (
+                PIECE_CODE_KEYS[rook][rook_square] ^ PIECE_CODE_KEYS[rook][rook_target]
+            )
+
+        castling_rights = self.castling_rights & (
+            CASTLING_MASKS[square] & CASTLING_MASKS[target]
+        )
+        zobrist_hash ^= (
+            CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[castling_rights]
+        )
+        self.castling_rights = castling_rights
+        self.hash = zobrist_hash ^ SIDE_KEY
+        self.en_passant = en_passant
+        if piece_type == PAWN or captured >= 0:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if side == BLACK:
+            self.fullmove_number += 1
+        self.side = 1 - side
+
+    def unmake_move(self):
+        """
+        take back the last move made with make_move.
+        """
+
+        (
+            square,
+            target,
+            piece,
+            captured,
+            self.castling_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.hash,
+        ) = self.move_stack.pop()
+
+        squares = self.squares
+        side = 1 - self.side
+        self.side = side
+        if side == BLACK:
+            self.fullmove_number -= 1
+
+        squares[square] = piece
+        squares[target] = captured
+
+        piece_type = piece - side * 6
+        if piece_type == PAWN and target == self.en_passant:
+            # En passant, the captured pawn goes back behind the target square
+            captured_square = target + 8 if side == WHITE else target - 8
+            squares[captured_square] = (1 - side) * 6 + PAWN
+
+        # Castling, put the rook back
+        elif piece_type == KING and (target - square == 2 or square - target == 2):
+            if target > square:
+                rook_square, rook_target = square + 3, square + 1
+            else:
+                rook_square, rook_target = square - 4, square - 1
+            squares[rook_target] = -1
+            squares[rook_square] = side * 6 + ROOK
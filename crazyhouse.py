@@ -1,36 +1,47 @@
-import pygame
-import os
-import copy
-
+import math
 
-class Chessboard:
-    def fen_to_current_position(self, fen):
-        """
-        from given fen string create self.current_position as a 2d-list with piece objects.
-        """
+import pygame
 
-        self.current_position = [[None] * 8 for _ in range(8)]
-        fen_parts = fen.split(" ")
-
-        # Process the piece positions part of the FEN string
-        fen_pieces = fen_parts[0]
-        rank_index = 0
-        file_index = 0
-
-        # logic
-        for char in fen_pieces:
-            if char == "/":
-                rank_index += 1
-                file_index = 0
-            elif char.isdigit():
-                file_index += int(char)
-            else:
-                self.current_position[rank_index][file_index] = Piece(
-                    "b" if char.islower() else "w", char.lower(), rank_index, file_index
-                )
-                file_index += 1
+from board import STARTING_FEN
+from crazyhouse_board import CrazyhouseBoard
+from game_clock import (
+    DEFAULT_TIME_LIMIT,
+    DEFAULT_INCREMENT,
+    DEFAULT_DELAY,
+    GameClock,
+    format_time,
+)
+from images import piece_images, text_image
+
+# Most frames drawn per second, the loop sleeps while nothing happens
+FRAMES_PER_SECOND = 30
+
+# Timer events, when the running clock's text changes and when its time runs out
+CLOCK_EVENT = pygame.USEREVENT
+FLAG_EVENT = pygame.USEREVENT + 1
+
+
+def milliseconds(seconds):
+    """
+    return seconds as whole milliseconds for a timer, rounded up, 0 for None.
+    """
+
+    if seconds is None:
+        return 0
+    return max(1, math.ceil(seconds * 1000))
+
+
+class Chessboard(CrazyhouseBoard):
+    def __init__(
+        self,
+        fen=STARTING_FEN + "[]",
+        time_limit=DEFAULT_TIME_LIMIT,
+        increment=DEFAULT_INCREMENT,
+        delay=DEFAULT_DELAY,
+    ):
+        # Set up the position and hands
+        super().__init__(fen)
 
-    def __init__(self):
         # Initialize Pygame
         pygame.init()
 
@@ -42,24 +53,16 @@ class Chessboard:
         self.RED = (150, 100, 100)
         self.font = pygame.font.Font(None, 24)
 
-        # White's turn
-        self.turn = "w"
         self.selected_piece = None
-        self.previous_move = []
         self.about_to_promote = False
         self.holding_hand_piece = False
         self.played_hand_piece = False
 
-        # Hands and names of bughouse
-        self.bughouse_hand_amounts = [[0, 0, 0, 0, 0], [0, 0, 0, 0, 0]]
-        self.bughouse_hand_names = ["q", "r", "n", "b", "p"]
-
-        # Create the clock
+        # Caps the frame rate of the game loop
         self.clock = pygame.time.Clock()
 
-        # 5 minutes in deciseconds, for each player
-        time_limit = 5 * 60 * 10
-        self.time_left = [time_limit, time_limit]
+        # Time of both players, in seconds
+        self.game_clock = GameClock(time_limit, increment, delay)
 
         # Set the size of each square on the chessboard
         self.square_size = 64
@@ -69,62 +72,38 @@ class Chessboard:
         # Create the Pygame screen
         self.screen = pygame.display.set_mode((self.board_width, self.board_height))
 
-        # Set the window title
-        pygame.display.set_caption("Chessboard")
-
-        # Load the piece images
-        self.piece_images = {}
+        # What each square and hand shows on screen, so only changes are redrawn
+        self.drawn_squares = [[None] * 8 for _ in range(8)]
+        self.drawn_hand_amounts = None
+        self.drawn_clock_texts = {"w": None, "b": None}
 
-        # Path to the directory containing the PNG images
-        directory = "icons"
+        # Promotion menu squares on screen, painted over when the menu closes
+        self.menu_rects = []
 
-        # Get a list of files in the directory
-        files = os.listdir(directory)
+        # Screen rectangles drawn on since the last display update
+        self.dirty_rects = []
 
-        # Loop through the files
-        for file in files:
-            # Check if the file is a PNG
-            if file.endswith(".png"):
-                # Remove the file extension to get the piece name
-                piece_name = os.path.splitext(file)[0]
-
-                # Load the image using Pygame
-                image_path = os.path.join(directory, file)
-                image = pygame.image.load(image_path)
-
-                # Add the image to the dictionary
-                self.piece_images[piece_name] = image
+        # Set the window title
+        pygame.display.set_caption("Chessboard")
 
-        # Define the starting positions for the pieces
-        starting_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
-        fen = "rnbqkbnr/pppppppp/8/8/8/4n3/PPPPPPPP/R3K2Q"
-        self.fen_to_current_position(starting_fen)
+        # Load the piece images, scaled and converted for the screen
+        self.piece_images = piece_images(self.square_size)
 
-    def update_time(self):
-        if self.turn == "w":
-            player_time = self.time_left[0]
-            enemy_time = self.time_left[1]
-            player_row = 10
+    def draw_clocks(self):
+        """
+        draw the time of both players, white's on row 10 and black's on row 1.
+        a clock is only drawn again when its text changes.
+        """
 
-            self.time_left[0] -= 1
-        else:
-            player_time = self.time_left[1]
-            enemy_time = self.time_left[0]
-            player_row = 1
+        for color, row in [("w", 10), ("b", 1)]:
+            text = format_time(self.game_clock.time_left(color))
+            if text == self.drawn_clock_texts[color]:
+                continue
+            self.drawn_clock_texts[color] = text
 
-            self.time_left[1] -= 1
-        
-        for row in [1, 10]:
             x = 6 * self.square_size
             y = row * self.square_size
 
-            if row == player_row:
-                player_deciseconds = player_time % 10
-                player_minutes, player_seconds = divmod(player_time//10, 60)
-            else:
-                player_deciseconds = enemy_time % 10
-                player_minutes, player_seconds = divmod(enemy_time//10, 60)
-
             # Draw the background square
             pygame.draw.rect(
                 self.screen, self.WHITE, (x, y, self.square_size, self.square_size)
@@ -136,22 +115,99 @@ class Chessboard:
                 width=4,
             )
 
-            if player_minutes >= 1:
-                timer_text = self.font.render(f"{player_minutes:02d}:{player_seconds:02d}", True, self.BLACK)
-            else:
-                timer_text = self.font.render(f"{player_seconds:02d}:{player_deciseconds:02d}", True, self.BLACK)
-            self.screen.blit(timer_text, (x, y))
+            self.screen.blit(text_image(self.font, text, self.BLACK), (x, y))
+            self.dirty_rects.append(
+                pygame.Rect(x, y, self.square_size, self.square_size)
+            )
 
-        
-    def draw_chessboard(self):
+    def schedule_clock_events(self):
         """
-        update board to match position
+        set the timers for the next change of the running clock's text and for
+        its flag fall.
         """
 
-        # Paint screen background
-        pygame.draw.rect(
-            self.screen, self.BLACK, (0, 0, self.board_width, self.board_height)
+        pygame.time.set_timer(
+            CLOCK_EVENT, milliseconds(self.game_clock.time_until_change()), loops=1
         )
+        pygame.time.set_timer(
+            FLAG_EVENT, milliseconds(self.game_clock.time_until_flag()), loops=1
+        )
+
+    def draw_square(self, row, column, dot=False):
+        """
+        draw square (row, col) with its piece, and a legal move dot if dot,
+        unless the screen shows it like that already.
+        """
+
+        # Toggle the square color
+        if (row, column) in self.previous_move:
+            color = self.RED
+        elif (row + column) % 2 == 0:
+            color = self.WHITE
+        else:
+            color = self.BLUE
+
+        # Get the piece name at the current position
+        piece = self.current_position[row][column]
+        piece_name = piece.color + piece.piece_name if piece else None
+
+        look = (color, piece_name, dot)
+        if self.drawn_squares[row][column] == look:
+            return
+        self.drawn_squares[row][column] = look
+
+        # Draw the square, row + 2 to create the offset in bughouse
+        x = column * self.square_size
+        y = (row + 2) * self.square_size
+        pygame.draw.rect(self.screen, color, (x, y, self.square_size, self.square_size))
+
+        # If a piece is present, draw the corresponding image
+        if piece:
+            self.screen.blit(self.piece_images[piece_name], (x, y))
+
+        # Grey circle around a capture, dot on an empty square
+        if dot:
+            center = (x + self.square_size // 2, y + self.square_size // 2)
+            if piece:
+                pygame.draw.circle(self.screen, self.GREY, center, radius=20, width=4)
+            else:
+                pygame.draw.circle(self.screen, self.GREY, center, radius=12)
+
+        self.dirty_rects.append(pygame.Rect(x, y, self.square_size, self.square_size))
+
+    def draw_chessboard(self, dots=()):
+        """
+        update board to match position, with legal move dots on the squares dots.
+        only squares and hands that changed since the last call are drawn again.
+        """
+
+        # Paint screen background, once
+        if self.drawn_hand_amounts is None:
+            pygame.draw.rect(
+                self.screen, self.BLACK, (0, 0, self.board_width, self.board_height)
+            )
+            self.dirty_rects.append(self.screen.get_rect())
+
+        # Close the promotion menu
+        for rect in self.menu_rects:
+            pygame.draw.rect(self.screen, self.BLACK, rect)
+            self.dirty_rects.append(rect)
+        self.menu_rects = []
+
+        # Hands, when a piece was captured or dropped
+        hand_amounts = [list(amounts) for amounts in self.bughouse_hand_amounts]
+        if hand_amounts != self.drawn_hand_amounts:
+            self.drawn_hand_amounts = hand_amounts
+            self.draw_hands()
+
+        for row in range(8):
+            for column in range(8):
+                self.draw_square(row, column, (row, column) in dots)
+
+    def draw_hands(self):
+        """
+        draw the hand pieces and their amounts, and the resign buttons.
+        """
 
         # Paint bughouse hand squares and add icons and amounts
         for row in [0, 11]:
@@ -193,7 +249,7 @@ class Chessboard:
 
                 # Draw piece amount
                 else:
-                    text = self.font.render(str(piece_amount), True, (255, 0, 0))
+                    text = text_image(self.font, str(piece_amount), (255, 0, 0))
                     text_rect = text.get_rect(
                         center=(
                             x + self.square_size * 3 // 4,
@@ -202,33 +258,11 @@ class Chessboard:
                     )
                     self.screen.blit(text, text_rect)
 
-        # Loop to draw the chessboard and pieces
-        for row in range(8):
-            for column in range(8):
-                # row + 2 to create the offset in bughouse
-                x = column * self.square_size
-                y = (row + 2) * self.square_size
-
-                # Toggle the square color
-                if (row, column) in self.previous_move:
-                    color = self.RED
-                elif (row + column) % 2 == 0:
-                    color = self.WHITE
-                else:
-                    color = self.BLUE
-
-                # Draw the square
-                pygame.draw.rect(
-                    self.screen, color, (x, y, self.square_size, self.square_size)
+            self.dirty_rects.append(
+                pygame.Rect(
+                    0, row * self.square_size, self.board_width, self.square_size
                 )
-
-                # Get the piece name at the current position
-                piece = self.current_position[row][column]
-
-                # If a piece is present, draw the corresponding image
-                if piece:
-                    piece_image = self.piece_images[piece.color + piece.piece_name]
-                    self.screen.blit(piece_image, (x, y))
+            )
 
     def draw_promotion_menu(self):
         """
@@ -263,121 +297,89 @@ class Chessboard:
             piece_image = self.piece_images[self.turn + piece_name]
             self.screen.blit(piece_image, (x, y))
 
+            rect = pygame.Rect(x, y, self.square_size, self.square_size)
+            self.menu_rects.append(rect)
+            self.dirty_rects.append(rect)
+
     def display_legal_moves(self, moves):
         """
         Display the legal moves as grey circles on the chessboard
         """
-        for move in moves:
-            row, column = move
-            x = column * self.square_size + self.square_size // 2
-            y = (row + 2) * self.square_size + self.square_size // 2
-            if self.current_position[row][column] is not None:  # if capturing
-                pygame.draw.circle(self.screen, self.GREY, (x, y), radius=20, width=4)
-            else:
-                pygame.draw.circle(self.screen, self.GREY, (x, y), radius=12)
 
-    def show_hand_piece_legal_moves(self, piece_name):
+        self.draw_chessboard(moves)
+
+    def wait_for_events(self):
         """
-        return bughouse hand piece's legal moves as (row, col)
+        return the pending events, sleeping until there is at least one.
         """
-        moves = []
-        rows = range(1, 7) if piece_name == "p" else range(8)
-        for row in rows:
-            for column in range(8):
-                if self.current_position[row][column] is None:
-                    moves.append((row, column))
-
-        illegal_moves = []
-        for move in moves:
-            # make new move location
-            row, column = move
-
-            temp_position = copy.deepcopy(self.current_position)
-            temp_position[row][column] = Piece(self.turn, piece_name, row, column)
-            # create new temporary position, with the possibly illegal move played
-
-            temp_all_pieces = []
-            for row in temp_position:
-                temp_all_pieces.extend([piece for piece in row if piece != None])
-
-            # find king
-            for some_piece in temp_all_pieces:
-                if some_piece.piece_name == "k" and some_piece.color == self.turn:
-                    king_location = some_piece.location
-
-            # Check if own king can be captured next turn
-            for enemy_piece in temp_all_pieces:
-                if enemy_piece.color != self.turn:
-                    if king_location in enemy_piece.show_legal_moves(
-                        temp_position, None, strict=False
-                    ):
-                        illegal_moves.append(move)
-
-        moves = [move for move in moves if move not in illegal_moves]
-        return moves
-
-    def make_move(self, target_location, en_passant=False, promotion=False, hand_piece=False):
+
+        return [pygame.event.wait()] + pygame.event.get()
+
+    def update_display(self):
         """
-        make the move.
-        change the previous move.
-        change the turn
+        push the parts of the screen drawn on since the last call to the display.
         """
 
-        target_row, target_column = target_location
+        if self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+            self.dirty_rects = []
+
+    def play_move(self, target_location, promotion=False, hand_piece=False):
+        """
+        play the selected piece to target_location, or drop hand_piece there.
+        """
 
         if hand_piece:
-            self.current_position[target_row][target_column] = Piece(
-                self.turn, hand_piece, target_row, target_column
-            )
-            self.previous_move = [
-                hand_piece,
-                (target_row, target_column),
-            ]
+            self.drop_piece(hand_piece, target_location)
             self.holding_hand_piece = False
         else:
-            original_row, original_column = self.selected_piece.location
-            self.previous_move = [
-                self.selected_piece.piece_name,
-                (original_row, original_column),
-                (target_row, target_column),
-            ]
-            self.current_position[original_row][original_column] = None
-
-            if promotion:
-                self.current_position[target_row][target_column] = Piece(
-                    self.turn, promotion, target_row, target_column
-                )
-                self.selected_piece.location = (target_row, target_column)
-                self.selected_piece.has_moved = True
-            else:
-                self.current_position[target_row][target_column] = self.selected_piece
-                self.selected_piece.location = (target_row, target_column)
-                self.selected_piece.has_moved = True
+            self.make_move(
+                (self.selected_piece.location, target_location, promotion or None)
+            )
 
-            if en_passant:
-                self.current_position[original_row][target_column] = None
+        # The player's clock stops, the opponent's starts
+        self.game_clock.press()
+        self.schedule_clock_events()
+        self.draw_clocks()
 
-        self.turn = "w" if self.turn == "b" else "b"
         self.selected_piece = None
 
-    def add_captured_to_hand(self, captured_piece):
-        """add the given captured piece to player's hand
-        """
-
-        hand_piece_index = self.bughouse_hand_names.index(captured_piece)
-        self.bughouse_hand_amounts[0 if self.turn == "b" else 1][hand_piece_index] += 1
-
     def run_game_loop(self):
         """
         main game loop. no arguments, no return,  just call this.
         """
         self.running = True
 
+        # Start the clock of the side to move
+        self.game_clock.start(self.turn)
+        self.schedule_clock_events()
+        self.draw_clocks()
+
         while self.running:
-            for event in pygame.event.get():
+            for event in self.wait_for_events():
                 if event.type == pygame.QUIT:
                     self.running = False
 
+                # Uncovered or restored, show the whole screen surface again
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    pygame.display.flip()
+
+                # Update the time
+                if event.type == CLOCK_EVENT:
+                    self.draw_clocks()
+                    self.schedule_clock_events()
+
+                # Out of time, timers can fire a little early
+                if event.type == FLAG_EVENT:
+                    flagged_color = self.game_clock.flagged()
+                    if flagged_color is not None:
+                        self.game_clock.stop()
+                        self.draw_clocks()
+                        print(f"{flagged_color} lost on time")
+                        self.running = False
+                    else:
+                        self.schedule_clock_events()
+
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # Left mouse button
                         mouse_position = pygame.mouse.get_pos()
@@ -395,7 +397,7 @@ class Chessboard:
                         if self.about_to_promote:
                             if row == menu_row and 2 <= column <= 5:
                                 # use previous row/column and promote
-                                self.make_move(
+                                self.play_move(
                                     (chessboard_row, chessboard_column),
                                     promotion=self.bughouse_hand_names[column - 2],
                                 )
@@ -418,13 +420,7 @@ class Chessboard:
                                 self.holding_hand_piece
                                 and (chessboard_row, chessboard_column) in legal_moves
                             ):
-                                hand_piece_index = self.bughouse_hand_names.index(
-                                    self.holding_hand_piece
-                                )
-                                self.bughouse_hand_amounts[
-                                    0 if self.turn == "b" else 1
-                                ][hand_piece_index] -= 1
-                                self.make_move(
+                                self.play_move(
                                     (chessboard_row, chessboard_column),
                                     hand_piece=self.holding_hand_piece,
                                 )
@@ -436,11 +432,7 @@ class Chessboard:
                             elif piece:
                                 # Select own piece
                                 if piece.color == self.turn:
-                                    legal_moves = piece.show_legal_moves(
-                                        self.current_position,
-                                        self.previous_move,
-                                        strict=True,
-                                    )
+                                    legal_moves = self.legal_targets(piece.location)
                                     self.display_legal_moves(legal_moves)
                                     print(
                                         f"selected piece {piece.piece_name} at {piece.location} with legal moves {legal_moves}"
@@ -466,21 +458,13 @@ class Chessboard:
                                             self.draw_promotion_menu()
                                             self.about_to_promote = True
 
-                                            # Update crazyhouse hand
-                                            captured_piece = piece.piece_name
-                                            self.add_captured_to_hand(captured_piece)
-
                                         else:
                                             print(
                                                 f"play move. {self.selected_piece.piece_name} at {self.selected_piece.location} captures {piece.piece_name} on {piece.location}."
                                             )
 
-                                            # Update crazyhouse hand
-                                            captured_piece = piece.piece_name
-                                            self.add_captured_to_hand(captured_piece)
-
                                             # Play the move on the board
-                                            self.make_move(
+                                            self.play_move(
                                                 (chessboard_row, chessboard_column)
                                             )
                                             self.draw_chessboard()
@@ -500,9 +484,8 @@ class Chessboard:
                                             f"en passant. {self.selected_piece.piece_name} at {self.selected_piece.location} moves to {(chessboard_row, chessboard_column)}."
                                         )
 
-                                        self.make_move(
-                                            (chessboard_row, chessboard_column),
-                                            en_passant=True,
+                                        self.play_move(
+                                            (chessboard_row, chessboard_column)
                                         )
                                         self.draw_chessboard()
 
@@ -523,7 +506,7 @@ class Chessboard:
                                         )
 
                                         # Play the move on the board
-                                        self.make_move(
+                                        self.play_move(
                                             (chessboard_row, chessboard_column)
                                         )
                                         self.draw_chessboard()
@@ -573,307 +556,22 @@ class Chessboard:
                             self.selected_piece = None
                             self.holding_hand_piece = False
 
-            # Update the time
-            self.clock.tick(10)
-            self.update_time()
+            # Update the changed part of the display
+            self.update_display()
 
-            # Update the display
-            pygame.display.flip()
-            
+            # Wait out the rest of the frame
+            self.clock.tick(FRAMES_PER_SECOND)
 
         # Quit Pygame
         pygame.quit()
 
-class Piece:
-    def __init__(self, color, piece_name, row, column):
-        # Initialize values
-        self.piece_name = piece_name
-        self.color = color
-        self.location = (row, column)
-        self.has_moved = False
 
-    def show_legal_moves(self, current_position, previous_move, strict=False):
-        """
-        return all legal moves for the piece as (row, col)
-        """
-        moves = []
-
-        # Get the current position of the piece
-        current_row, current_column = self.location
-
-        # Bishop moves
-        if self.piece_name == "b":
-            for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                for i in range(1, 8):
-                    new_row = current_row + i * dx
-                    new_column = current_column + i * dy
-                    if 0 <= new_row <= 7 and 0 <= new_column <= 7:
-                        if current_position[new_row][new_column] is None:
-                            moves.append((new_row, new_column))
-                        elif current_position[new_row][new_column].color != self.color:
-                            moves.append((new_row, new_column))
-                            break
-                        else:
-                            break
-                    else:
-                        break
-
-        # Rook moves
-        elif self.piece_name == "r":
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                for i in range(1, 8):
-                    new_row = current_row + i * dx
-                    new_column = current_column + i * dy
-                    if 0 <= new_row <= 7 and 0 <= new_column <= 7:
-                        if current_position[new_row][new_column] is None:
-                            moves.append((new_row, new_column))
-                        elif current_position[new_row][new_column].color != self.color:
-                            moves.append((new_row, new_column))
-                            break
-                        else:
-                            break
-                    else:
-                        break
-
-        # King moves
-        elif self.piece_name == "k":
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx == 0 and dy == 0:
-                        continue
-                    new_row = current_row + dx
-                    new_column = current_column + dy
-                    if 0 <= new_row <= 7 and 0 <= new_column <= 7:
-                        if current_position[new_row][new_column] is None:
-                            moves.append((new_row, new_column))
-                        elif current_position[new_row][new_column].color != self.color:
-                            moves.append((new_row, new_column))
-
-            # Castling.
-            if self.has_moved == False and strict:
-                for dy, rook_column in [(-2, 0), (2, 7)]:
-                    if (
-                        current_position[current_row][current_column + dy] is None
-                        and current_position[current_row][current_column + dy // 2]
-                        is None
-                    ):
-                        rook = current_position[current_row][rook_column]
-                        if rook is None:
-                            continue
-                        else:
-                            if (
-                                rook.piece_name == "r"
-                                and rook.color == self.color
-                                and rook.has_moved == False
-                            ):
-                                # Test if king under check
+if __name__ == "__main__":
+    # Create an instance of the Chessboard class
+    chessboard = Chessboard()
 
-                                all_pieces = []
-                                for row in current_position:
-                                    all_pieces.extend(
-                                        [piece for piece in row if piece != None]
-                                    )
+    # Draw the chessboard and pieces
+    chessboard.draw_chessboard()
 
-                                under_check = False
-                                for enemy_piece in all_pieces:
-                                    if enemy_piece.color != self.color:
-                                        if (
-                                            self.location
-                                            in enemy_piece.show_legal_moves(
-                                                current_position, None, strict=False
-                                            )
-                                        ):
-                                            print(
-                                                f"under check by {enemy_piece.piece_name} at {enemy_piece.location}"
-                                            )
-                                            under_check = True
-
-                                # Test if castling through check
-                                new_column = current_column + dy // 2
-
-                                king_location = (current_row, new_column)
-
-                                castling_through_check = False
-                                for enemy_piece in all_pieces:
-                                    if enemy_piece.color != self.color:
-                                        if (
-                                            king_location
-                                            in enemy_piece.show_legal_moves(
-                                                current_position, None, strict=False
-                                            )
-                                        ):
-                                            print(
-                                                f"trying to castle through check by {enemy_piece.piece_name} at {enemy_piece.location}"
-                                            )
-                                            castling_through_check = True
-
-                                if not castling_through_check and not under_check:
-                                    new_column = current_column + dy
-                                    moves.append((current_row, new_column))
-
-        # Queen moves
-        elif self.piece_name == "q":
-            for dx, dy in [
-                (-1, -1),
-                (-1, 1),
-                (1, -1),
-                (1, 1),
-                (-1, 0),
-                (1, 0),
-                (0, -1),
-                (0, 1),
-            ]:
-                for i in range(1, 8):
-                    new_row = current_row + i * dx
-                    new_column = current_column + i * dy
-                    if 0 <= new_row <= 7 and 0 <= new_column <= 7:
-                        if current_position[new_row][new_column] is None:
-                            moves.append((new_row, new_column))
-                        elif current_position[new_row][new_column].color != self.color:
-                            moves.append((new_row, new_column))
-                            break
-                        else:
-                            break
-                    else:
-                        break
-
-        # Knight moves
-        elif self.piece_name == "n":
-            knight_moves = [
-                (1, 2),
-                (1, -2),
-                (-1, 2),
-                (-1, -2),
-                (2, 1),
-                (2, -1),
-                (-2, 1),
-                (-2, -1),
-            ]
-            for dx, dy in knight_moves:
-                new_row = current_row + dx
-                new_column = current_column + dy
-                if 0 <= new_row <= 7 and 0 <= new_column <= 7:
-                    if (
-                        current_position[new_row][new_column] is None
-                        or current_position[new_row][new_column].color != self.color
-                    ):
-                        moves.append((new_row, new_column))
-
-        # Pawn moves
-        elif self.piece_name == "p":
-            if self.color == "w":
-                # Moves for white pawn
-                new_row = current_row - 1
-                if 0 <= new_row <= 7:
-                    if current_position[new_row][current_column] is None:
-                        moves.append((new_row, current_column))
-
-                    if (
-                        current_row == 6
-                        and current_position[new_row][current_column] is None
-                        and current_position[new_row - 1][current_column] is None
-                    ):
-                        moves.append((new_row - 1, current_column))
-
-                # Capturing moves
-                capture_moves = [
-                    (current_row - 1, current_column - 1),
-                    (current_row - 1, current_column + 1),
-                ]
-                for move in capture_moves:
-                    new_row, new_column = move
-                    if 0 <= new_row <= 7 and 0 <= new_column <= 7:
-                        if (
-                            current_position[new_row][new_column] is not None
-                            and current_position[new_row][new_column].color
-                            != self.color
-                        ):
-                            moves.append(move)
-
-                # En passant
-                if current_row == 3:
-                    for enemy_column in [current_column - 1, current_column + 1]:
-                        if previous_move == ["p", (1, enemy_column), (3, enemy_column)]:
-                            moves.append((new_row, enemy_column))
-
-            else:
-                # Moves for black pawn
-                new_row = current_row + 1
-                if 0 <= new_row <= 7:
-                    if current_position[new_row][current_column] is None:
-                        moves.append((new_row, current_column))
-
-                    if (
-                        current_row == 1
-                        and current_position[new_row][current_column] is None
-                        and current_position[new_row + 1][current_column] is None
-                    ):
-                        moves.append((new_row + 1, current_column))
-
-                # Capturing moves
-                capture_moves = [
-                    (current_row + 1, current_column - 1),
-                    (current_row + 1, current_column + 1),
-                ]
-                for move in capture_moves:
-                    new_row, new_column = move
-                    if 0 <= new_row <= 7 and 0 <= new_column <= 7:
-                        if (
-                            current_position[new_row][new_column] is not None
-                            and current_position[new_row][new_column].color
-                            != self.color
-                        ):
-                            moves.append(move)
-
-                # En passant
-                if current_row == 4:
-                    for enemy_column in [current_column - 1, current_column + 1]:
-                        if previous_move == ["p", (6, enemy_column), (4, enemy_column)]:
-                            moves.append((new_row, enemy_column))
-
-        illegal_moves = []
-
-        # test if move is illegal because king can be captured
-        if strict:
-            for move in moves:
-                # make new move location
-                new_row, new_column = move
-
-                temp_position = copy.deepcopy(current_position)
-                temp_piece = temp_position[current_row][current_column]
-                temp_piece.location = (new_row, new_column)
-                temp_position[new_row][new_column] = temp_piece
-                temp_position[current_row][current_column] = None
-                # create new temporary position, with the possibly illegal move played
-
-                temp_all_pieces = []
-                for row in temp_position:
-                    temp_all_pieces.extend([piece for piece in row if piece != None])
-
-                # find king
-                for some_piece in temp_all_pieces:
-                    if some_piece.piece_name == "k" and some_piece.color == self.color:
-                        king_location = some_piece.location
-
-                for enemy_piece in temp_all_pieces:
-                    if (
-                        enemy_piece.color != self.color
-                        and enemy_piece.location != self.location
-                    ):
-                        if king_location in enemy_piece.show_legal_moves(
-                            temp_position, None, strict=False
-                        ):
-                            illegal_moves.append(move)
-
-        moves = [move for move in moves if move not in illegal_moves]
-        return moves
-
-
-# Create an instance of the Chessboard class
-chessboard = Chessboard()
-
-# Draw the chessboard and pieces
-chessboard.draw_chessboard()
-
-# Run the game loop
-chessboard.run_game_loop()
+    # Run the game loop
+    chessboard.run_game_loop()
@@ -0,0 +1,333 @@
+from collections import OrderedDict
+
+from board import STARTING_FEN, LEGAL_MOVE_CACHE_SIZE, Board, Piece
+from fen import split_crazyhouse_fen, join_crazyhouse_fen
+from tables import (
+    KNIGHT_SQUARES,
+    PAWN_CAPTURE_SQUARES,
+    DIAGONAL_RAY_SQUARES,
+    STRAIGHT_RAY_SQUARES,
+)
+from zobrist import PIECE_KEYS, EN_PASSANT_KEYS, SIDE_KEY, HAND_KEYS, PROMOTED_KEYS
+
+# Pieces that can be in a hand, in the order of bughouse_hand_amounts
+HAND_NAMES = ["q", "r", "n", "b", "p"]
+
+
+class CrazyhouseBoard(Board):
+    """
+    headless crazyhouse position and rules, no pygame. captured pieces go to the
+    hand of the capturer, promoted ones as pawns, and are dropped back on the
+    board with the move (None, target_location, piece_name). the hash includes
+    the hands and which pieces are promoted.
+    """
+
+    def fen_to_current_position(self, fen):
+        """
+        from given crazyhouse fen string create self.current_position and the hands.
+        hand pieces come in brackets after the placement, promoted pieces are marked ~.
+        """
+
+        board_fen, hands, promoted_squares = split_crazyhouse_fen(fen)
+        super().fen_to_current_position(board_fen)
+
+        for square in promoted_squares:
+            piece = self.current_position[square // 8][square % 8]
+            if piece is not None:
+                piece.promoted = True
+                self.hash ^= PROMOTED_KEYS[square]
+
+        # Hands and names of bughouse, black's hand first
+        self.bughouse_hand_names = HAND_NAMES
+        self.bughouse_hand_amounts = [
+            [hands[color].get(piece_name, 0) for piece_name in self.bughouse_hand_names]
+            for color in ["b", "w"]
+        ]
+        for color, amounts in zip(["b", "w"], self.bughouse_hand_amounts):
+            for piece_name, amount in zip(self.bughouse_hand_names, amounts):
+                self.hash ^= HAND_KEYS[color][piece_name][amount]
+
+    def fen(self):
+        """
+        return the crazyhouse fen string of the position, hands in brackets.
+        """
+
+        hands = {
+            color: dict(zip(self.bughouse_hand_names, amounts))
+            for color, amounts in zip(["b", "w"], self.bughouse_hand_amounts)
+        }
+        promoted_squares = [
+            piece.location[0] * 8 + piece.location[1]
+            for color in ["w", "b"]
+            for piece in self.piece_lists[color]
+            if piece.promoted
+        ]
+        return join_crazyhouse_fen(super().fen(), hands, promoted_squares)
+
+    def __init__(self, fen=STARTING_FEN + "[]", captures_to_hand=True):
+        # Captured pieces go to the own hand, bughouse hands them to the partner
+        self.captures_to_hand = captures_to_hand
+
+        # Drop squares by zobrist hash, see drop_squares
+        self.drop_square_cache = OrderedDict()
+
+        # Set up the position and hands
+        super().__init__(fen)
+
+    def compute_hash(self):
+        """
+        return the zobrist hash of the position, hands and promoted pieces
+        included, computed from scratch.
+        """
+
+        zobrist_hash = super().compute_hash()
+        for color, amounts in zip(["b", "w"], self.bughouse_hand_amounts):
+            for piece_name, amount in zip(self.bughouse_hand_names, amounts):
+                zobrist_hash ^= HAND_KEYS[color][piece_name][amount]
+        for color in ["w", "b"]:
+            for piece in self.piece_lists[color]:
+                if piece.promoted:
+                    zobrist_hash ^= PROMOTED_KEYS[
+                        piece.location[0] * 8 + piece.location[1]
+                    ]
+        return zobrist_hash
+
+    def change_hand(self, color, piece_name, change):
+        """
+        add change, 1 or -1, to the amount of piece_name in the hand of color.
+        """
+
+        amounts = self.bughouse_hand_amounts[0 if color == "b" else 1]
+        hand_piece_index = self.bughouse_hand_names.index(piece_name)
+        amount = amounts[hand_piece_index]
+        keys = HAND_KEYS[color][piece_name]
+        self.hash ^= keys[amount] ^ keys[amount + change]
+        amounts[hand_piece_index] = amount + change
+
+    def add_captured_to_hand(self, captured_piece, color=None):
+        """
+        add the given captured piece to the hand of color, the player to move
+        if None.
+        """
+
+        self.change_hand(color or self.turn, captured_piece, 1)
+
+    def legal_moves(self):
+        """
+        return all legal moves for the side to move: board moves as
+        (from_location, target_location, promotion) and drops of every piece
+        in hand as (None, target_location, piece_name).
+        """
+
+        moves = super().legal_moves()
+        amounts = self.bughouse_hand_amounts[0 if self.turn == "b" else 1]
+        for piece_name, amount in zip(self.bughouse_hand_names, amounts):
+            if amount:
+                for target_location in self.show_hand_piece_legal_moves(piece_name):
+                    moves.append((None, target_location, piece_name))
+        return moves
+
+    def show_hand_piece_legal_moves(self, piece_name):
+        """
+        return bughouse hand piece's legal moves as (row, col)
+        """
+
+        # Pawns are never dropped on the back ranks
+        return [
+            location
+            for location in self.drop_squares()
+            if piece_name != "p" or 1 <= location[0] <= 6
+        ]
+
+    def drop_squares(self):
+        """
+        return the empty squares (row, col) a piece can be dropped on.
+        a drop never exposes the own king, so out of check every empty square
+        goes. in check only a square between the king and a single checking
+        slider does. generated once per zobrist hash.
+        """
+
+        squares = self.drop_square_cache.get(self.hash)
+        if squares is not None:
+            self.drop_square_cache.move_to_end(self.hash)
+            return squares
+
+        if self.is_check():
+            squares = self.check_blocking_squares()
+        else:
+            squares = [
+                (row, column)
+                for row in range(8)
+                for column in range(8)
+                if self.current_position[row][column] is None
+            ]
+
+        self.drop_square_cache[self.hash] = squares
+        if len(self.drop_square_cache) > LEGAL_MOVE_CACHE_SIZE:
+            self.drop_square_cache.popitem(last=False)
+        return squares
+
+    def check_blocking_squares(self):
+        """
+        return the empty squares (row, col) that block the check on the king
+        of the side to move. none if a knight, a pawn or two pieces give check.
+        """
+
+        king_row, king_column = self.king_squares[self.turn]
+        enemy_color = "b" if self.turn == "w" else "w"
+        checkers = 0
+        blocking_squares = []
+
+        # Knights and pawns can't be blocked
+        for squares, piece_name in [
+            (KNIGHT_SQUARES[king_row][king_column], "n"),
+            (PAWN_CAPTURE_SQUARES[self.turn][king_row][king_column], "p"),
+        ]:
+            for new_row, new_column in squares:
+                piece = self.current_position[new_row][new_column]
+                if (
+                    piece is not None
+                    and piece.color == enemy_color
+                    and piece.piece_name == piece_name
+                ):
+                    checkers += 1
+
+        # Slider rays, the empty squares up to the checking piece block it
+        for rays, slider_names in [
+            (DIAGONAL_RAY_SQUARES[king_row][king_column], ("b", "q")),
+            (STRAIGHT_RAY_SQUARES[king_row][king_column], ("r", "q")),
+        ]:
+            for ray in rays:
+                between_squares = []
+                for new_row, new_column in ray:
+                    piece = self.current_position[new_row][new_column]
+                    if piece is None:
+                        between_squares.append((new_row, new_column))
+                        continue
+                    if piece.color == enemy_color and piece.piece_name in slider_names:
+                        checkers += 1
+                        blocking_squares = between_squares
+                    break
+
+        return blocking_squares if checkers == 1 else []
+
+    def make_move(self, move):
+        """
+        make the move or drop in place and push an undo record for unmake_move.
+        a captured piece goes to the capturer's hand, unless captures_to_hand is off.
+        """
+
+        from_location, target_location, promotion = move
+        if from_location is None:
+            self.make_drop(move)
+            return
+
+        color = self.turn
+        from_square = from_location[0] * 8 + from_location[1]
+        target_square = target_location[0] * 8 + target_location[1]
+        piece = self.current_position[from_location[0]][from_location[1]]
+        target_piece = self.current_position[target_location[0]][target_location[1]]
+
+        # Promoted marks move along, get captured or are made by the promotion
+        promoted_hash = 0
+        if piece.promoted:
+            promoted_hash ^= PROMOTED_KEYS[from_square] ^ PROMOTED_KEYS[target_square]
+        if target_piece is not None and target_piece.promoted:
+            promoted_hash ^= PROMOTED_KEYS[target_square]
+        if promotion:
+            promoted_hash ^= PROMOTED_KEYS[target_square]
+
+        super().make_move(move)
+        self.hash ^= promoted_hash
+
+        # Promoted pieces go back to the hand as pawns
+        captured_piece = self.move_stack[-1][3]
+        if captured_piece is not None and self.captures_to_hand:
+            self.add_captured_to_hand(
+                "p" if captured_piece.promoted else captured_piece.piece_name, color
+            )
+
+    def make_drop(self, move):
+        """
+        drop a piece from the hand of the side to move, move is
+        (None, target_location, piece_name) on an empty square.
+        """
+
+        _, (row, column), piece_name = move
+        piece = Piece(self.turn, piece_name, row, column)
+
+        # Dropped rooks can't castle
+        piece.has_moved = True
+
+        # Undo record: move, dropped piece, previous move, halfmove clock and hash
+        self.move_stack.append(
+            (move, piece, self.previous_move, self.halfmove_clock, self.hash)
+        )
+
+        self.current_position[row][column] = piece
+        self.piece_lists[self.turn].append(piece)
+        self.change_hand(self.turn, piece_name, -1)
+
+        zobrist_hash = self.hash ^ PIECE_KEYS[self.turn][piece_name][row * 8 + column]
+        en_passant_column = self.en_passant_column()
+        if en_passant_column is not None:
+            zobrist_hash ^= EN_PASSANT_KEYS[en_passant_column]
+        self.hash = zobrist_hash ^ SIDE_KEY
+
+        self.previous_move = [piece_name, (row, column)]
+        self.halfmove_clock += 1
+        if self.turn == "b":
+            self.fullmove_number += 1
+        self.turn = "w" if self.turn == "b" else "b"
+
+    def drop_piece(self, piece_name, location):
+        """
+        drop piece_name from the hand of the side to move on the empty square
+        location (row, col), the move (None, location, piece_name).
+        """
+
+        self.make_move((None, location, piece_name))
+
+    def unmake_move(self):
+        """
+        take back the last move or drop made with make_move.
+        """
+
+        record = self.move_stack[-1]
+        if record[0][0] is None:
+            self.unmake_drop()
+            return
+
+        # The hash comes back with the undo record
+        captured_piece = record[3]
+        if captured_piece is not None and self.captures_to_hand:
+            self.change_hand(
+                "b" if self.turn == "w" else "w",
+                "p" if captured_piece.promoted else captured_piece.piece_name,
+                -1,
+            )
+        super().unmake_move()
+
+    def unmake_drop(self):
+        """
+        take the last dropped piece back to the hand.
+        """
+
+        (
+            _,
+            piece,
+            self.previous_move,
+            self.halfmove_clock,
+            zobrist_hash,
+        ) = self.move_stack.pop()
+
+        self.turn = "w" if self.turn == "b" else "b"
+        if self.turn == "b":
+            self.fullmove_number -= 1
+
+        # Moves after the drop were taken back, so it is last in its piece list
+        row, column = piece.location
+        self.current_position[row][column] = None
+        self.piece_lists[self.turn].pop()
+        self.change_hand(self.turn, piece.piece_name, 1)
+        self.hash = zobrist_hash
@@ -0,0 +1,281 @@
+from array import array
+
+from tables import WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from zobrist import PIECE_CODE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, SIDE_KEY
+
+# Fen strings: parsing into plain fields every engine builds its position
+# from, writing them back, and loading many positions from a file.
+# pieces are codes color * 6 + piece type, -1 an empty square, like bitboard.py.
+
+# Fen letter of every piece code
+FEN_LETTERS = "PNBRQKpnbrqk"
+
+# Castling rights and the fen letter, king square and rook square of each
+CASTLING_LETTERS = [
+    (WHITE_KINGSIDE, "K", 60, 63),
+    (WHITE_QUEENSIDE, "Q", 60, 56),
+    (BLACK_KINGSIDE, "k", 4, 7),
+    (BLACK_QUEENSIDE, "q", 4, 0),
+]
+
+# Parsed ranks per row by rank string: 8 piece codes and their zobrist keys.
+# positions share most of their ranks, so parsing a file mostly hits this cache.
+_RANK_CACHES = [{} for _ in range(8)]
+RANK_CACHE_SIZE = 1 << 14
+
+# Castling rights by castling field, like "KQkq"
+_CASTLING_FIELDS = {}
+
+
+def parse_rank(row, rank):
+    """
+    return (piece codes as 8 bytes, 255 empty, xor of their zobrist keys) of
+    rank string from a fen, like "rnbqkbnr" or "4P3".
+    """
+
+    cache = _RANK_CACHES[row]
+    cached = cache.get(rank)
+    if cached is not None:
+        return cached
+
+    codes = bytearray()
+    zobrist_hash = 0
+    for char in rank:
+        if char.isdigit():
+            codes.extend(b"\xff" * int(char))
+        else:
+            code = FEN_LETTERS.index(char)
+            zobrist_hash ^= PIECE_CODE_KEYS[code][row * 8 + len(codes)]
+            codes.append(code)
+    if len(codes) != 8:
+        raise ValueError(f"bad fen rank {rank!r}")
+
+    if len(cache) >= RANK_CACHE_SIZE:
+        cache.clear()
+    cache[rank] = cached = (bytes(codes), zobrist_hash)
+    return cached
+
+
+def parse_castling(field):
+    """
+    return castling rights bits of castling field, like "KQkq" or "-".
+    """
+
+    castling_rights = _CASTLING_FIELDS.get(field)
+    if castling_rights is None:
+        castling_rights = 0
+        for right, letter, _, _ in CASTLING_LETTERS:
+            if letter in field:
+                castling_rights |= right
+        _CASTLING_FIELDS[field] = castling_rights
+    return castling_rights
+
+
+def parse_fen(fen):
+    """
+    return (squares, side, castling_rights, en_passant, halfmove_clock,
+    fullmove_number, hash) of fen string. squares is an array('b') of 64 piece
+    codes, side 0 white or 1 black, en_passant a square index or -1.
+    missing fields default to white to move, castling wherever king and rook
+    stand on their starting squares, no en passant and clocks 0 1. castling
+    rights without their king and rook and en passant squares without the
+    pawn that skipped them are dropped.
+    """
+
+    fen_parts = fen.split()
+    ranks = fen_parts[0].split("/")
+    if len(ranks) != 8:
+        raise ValueError(f"fen needs 8 ranks: {fen!r}")
+
+    placement = []
+    zobrist_hash = 0
+    for row, rank in enumerate(ranks):
+        cached = _RANK_CACHES[row].get(rank) or parse_rank(row, rank)
+        placement.append(cached[0])
+        zobrist_hash ^= cached[1]
+    squares = array("b", b"".join(placement))
+
+    # Side to move
+    side = 1 if len(fen_parts) > 1 and fen_parts[1] == "b" else 0
+
+    # Castling rights, only while king and rook stand on their starting squares
+    if len(fen_parts) > 2:
+        castling_rights = parse_castling(fen_parts[2])
+    else:
+        castling_rights = (
+            WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+        )
+    for right, letter, king_square, rook_square in CASTLING_LETTERS:
+        color = 0 if letter.isupper() else 6
+        if squares[king_square] != color + 5 or squares[rook_square] != color + 3:
+            castling_rights &= ~right
+
+    # En passant target square, only behind an enemy pawn that just moved two
+    en_passant = -1
+    if len(fen_parts) > 3 and fen_parts[3] != "-":
+        column = ord(fen_parts[3][0]) - ord("a")
+        row = 8 - int(fen_parts[3][1])
+        pawn_row, pawn_code = (3, 6) if side == 0 else (4, 0)
+        if (
+            row == (2 if side == 0 else 5)
+            and squares[pawn_row * 8 + column] == pawn_code
+        ):
+            en_passant = row * 8 + column
+
+    # Clocks
+    halfmove_clock = int(fen_parts[4]) if len(fen_parts) > 4 else 0
+    fullmove_number = int(fen_parts[5]) if len(fen_parts) > 5 else 1
+
+    zobrist_hash ^= CASTLING_KEYS[castling_rights]
+    if en_passant >= 0:
+        zobrist_hash ^= EN_PASSANT_KEYS[en_passant % 8]
+    if side:
+        zobrist_hash ^= SIDE_KEY
+
+    return (
+        squares,
+        side,
+        castling_rights,
+        en_passant,
+        halfmove_clock,
+        fullmove_number,
+        zobrist_hash,
+    )
+
+
+def format_fen(
+    squares, side, castling_rights, en_passant, halfmove_clock=0, fullmove_number=1
+):
+    """
+    return the fen string of a position given as the fields parse_fen returns.
+    """
+
+    ranks = []
+    for row in range(8):
+        rank = ""
+        empty = 0
+        for code in squares[row * 8 : row * 8 + 8]:
+            if code < 0:
+                empty += 1
+            else:
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += FEN_LETTERS[code]
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+
+    castling = "".join(
+        letter for right, letter, _, _ in CASTLING_LETTERS if castling_rights & right
+    )
+    if en_passant >= 0:
+        en_passant_square = "abcdefgh"[en_passant % 8] + str(8 - en_passant // 8)
+    else:
+        en_passant_square = "-"
+
+    return (
+        f"{'/'.join(ranks)} {'b' if side else 'w'} {castling or '-'} "
+        f"{en_passant_square} {halfmove_clock} {fullmove_number}"
+    )
+
+
+def split_crazyhouse_fen(fen):
+    """
+    split a crazyhouse fen into (standard fen, hands, promoted squares).
+    hand pieces come in brackets after the placement, "...RNBQKBNR[Qnp] w ...",
+    or as a ninth rank, "...RNBQKBNR/Qnp w ...". hands is
+    {"w": {piece_name: amount}, "b": {...}}. pieces marked "~" are promoted,
+    promoted squares are their square indexes.
+    """
+
+    placement, _, rest = fen.strip().partition(" ")
+
+    hand = ""
+    if placement.endswith("]"):
+        placement, _, hand = placement[:-1].partition("[")
+    elif placement.count("/") == 8:
+        placement, _, hand = placement.rpartition("/")
+
+    hands = {"w": {}, "b": {}}
+    for char in hand:
+        if char == "-":
+            continue
+        color = "b" if char.islower() else "w"
+        piece_name = char.lower()
+        hands[color][piece_name] = hands[color].get(piece_name, 0) + 1
+
+    promoted_squares = []
+    if "~" in placement:
+        square = 0
+        for char in placement:
+            if char == "~":
+                promoted_squares.append(square - 1)
+            elif char.isdigit():
+                square += int(char)
+            elif char != "/":
+                square += 1
+        placement = placement.replace("~", "")
+
+    return " ".join([placement, rest]).strip(), hands, promoted_squares
+
+
+def join_crazyhouse_fen(fen, hands, promoted_squares=()):
+    """
+    return crazyhouse fen of standard fen plus hands and promoted squares, the
+    inverse of split_crazyhouse_fen. hands are written in brackets.
+    """
+
+    placement, _, rest = fen.partition(" ")
+
+    if promoted_squares:
+        promoted_squares = set(promoted_squares)
+        marked = ""
+        square = 0
+        for char in placement:
+            marked += char
+            if char.isdigit():
+                square += int(char)
+            elif char != "/":
+                if square in promoted_squares:
+                    marked += "~"
+                square += 1
+        placement = marked
+
+    hand = ""
+    for color in ["w", "b"]:
+        for piece_name in "qrbnp":
+            letter = piece_name.upper() if color == "w" else piece_name
+            hand += letter * hands[color].get(piece_name, 0)
+
+    return f"{placement}[{hand}] {rest}".strip()
+
+
+def read_fens(path):
+    """
+    yield the fen of every position in a file of fen or epd lines.
+    epd operations are dropped, blank lines and lines starting with # skipped.
+    """
+
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            fields = line.split()
+            # Epd has 4 fields followed by operations instead of the clocks
+            if len(fields) > 4 and not fields[4].isdigit():
+                line = " ".join(fields[:4])
+            yield line
+
+
+def load_positions(path, engine="compact"):
+    """
+    yield a board for every position in a file of fen or epd lines.
+    """
+
+    from board import create_board
+
+    for fen in read_fens(path):
+        yield create_board(fen, engine)
@@ -0,0 +1,128 @@
+import time
+
+# Time control of a crazyhouse game, in seconds
+DEFAULT_TIME_LIMIT = 5 * 60
+DEFAULT_INCREMENT = 0
+DEFAULT_DELAY = 0
+
+
+class GameClock:
+    """
+    chess clock for two players, no pygame. remaining time is only written at
+    move boundaries, from monotonic timestamps, so it doesn't depend on how
+    often it is read. a player's time runs down after delay seconds of every
+    turn and gains increment seconds (fischer) for every move in time.
+    """
+
+    def __init__(
+        self,
+        time_limit=DEFAULT_TIME_LIMIT,
+        increment=DEFAULT_INCREMENT,
+        delay=DEFAULT_DELAY,
+        now=time.monotonic,
+    ):
+        self.increment = increment
+        self.delay = delay
+
+        # Source of timestamps in seconds, never going back
+        self.now = now
+
+        # Time left by color at the start of the running turn
+        self.remaining = {"w": time_limit, "b": time_limit}
+
+        # Color whose time runs and when its turn started, None before start
+        self.running_color = None
+        self.turn_started = None
+
+    def start(self, color="w"):
+        """
+        start the time of color.
+        """
+
+        self.running_color = color
+        self.turn_started = self.now()
+
+    def stop(self):
+        """
+        stop both times, the running one keeps what it used.
+        """
+
+        if self.running_color is not None:
+            self.remaining[self.running_color] = self.time_left(self.running_color)
+            self.running_color = None
+
+    def time_left(self, color):
+        """
+        return the seconds color has left now, never below zero.
+        """
+
+        remaining = self.remaining[color]
+        if color == self.running_color:
+            used = self.now() - self.turn_started
+            remaining -= max(0, used - self.delay)
+        return max(0, remaining)
+
+    def press(self):
+        """
+        end the turn of the running color at a move and start the other one.
+        the increment is only added if the move was in time.
+        """
+
+        color = self.running_color
+        time_left = self.time_left(color)
+        if time_left > 0:
+            time_left += self.increment
+        self.remaining[color] = time_left
+        self.start("b" if color == "w" else "w")
+
+    def flagged(self):
+        """
+        return the color whose time ran out, or None.
+        """
+
+        for color in ["w", "b"]:
+            if self.time_left(color) <= 0:
+                return color
+        return None
+
+    def time_until_flag(self):
+        """
+        return the seconds until the running color runs out of time, None if
+        the clock is stopped.
+        """
+
+        if self.running_color is None:
+            return None
+        return self.time_left(self.running_color) + self.delay_left()
+
+    def time_until_change(self):
+        """
+        return the seconds until the format_time text of the running color
+        changes, None if the clock is stopped.
+        """
+
+        if self.running_color is None:
+            return None
+        time_left = self.time_left(self.running_color)
+        step = 1 if time_left >= 60 else 0.1
+        return time_left - int(time_left / step) * step + self.delay_left()
+
+    def delay_left(self):
+        """
+        return the seconds of delay left before the running color's time runs.
+        """
+
+        return max(0, self.delay - (self.now() - self.turn_started))
+
+
+def format_time(seconds):
+    """
+    return the clock text of seconds: minutes and seconds, or seconds and
+    tenths under a minute.
+    """
+
+    tenths = int(seconds * 10)
+    if tenths >= 600:
+        minutes, seconds = divmod(tenths // 10, 60)
+        return f"{minutes:02d}:{seconds:02d}"
+    return f"{tenths // 10:02d}:{tenths % 10:02d}"
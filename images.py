@@ -0,0 +1,103 @@
+import os
+from collections import OrderedDict
+
+import pygame
+
+# Piece and button images, next to this file so the gui runs from any directory
+ICON_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons")
+
+# Square size the icons are drawn for, they are shown at their own size on it
+ICON_SQUARE_SIZE = 64
+
+# Images as read from disk, by name like "wq"
+_icons = {}
+
+# Images ready to blit, by (square size, atlas) and name
+_image_sets = {}
+
+# Most rendered texts kept, the least recently used is dropped first.
+# enough for every text a 5 minute clock shows
+TEXT_CACHE_SIZE = 1024
+
+# Rendered texts ready to blit, by (font, text, color)
+_texts = OrderedDict()
+
+
+def load_icons():
+    """
+    return every png of ICON_DIRECTORY by name, read from disk once.
+    """
+
+    if not _icons:
+        for file in sorted(os.listdir(ICON_DIRECTORY)):
+            if file.endswith(".png"):
+                piece_name = os.path.splitext(file)[0]
+                _icons[piece_name] = pygame.image.load(
+                    os.path.join(ICON_DIRECTORY, file)
+                )
+    return _icons
+
+
+def piece_images(square_size=ICON_SQUARE_SIZE, atlas=False):
+    """
+    return {name: image} of every icon, scaled for squares of square_size and
+    converted to the display format, so blits need no conversion.
+    with atlas, the images are subsurfaces of one surface holding them all.
+    the display mode has to be set first. images are made once per square size.
+    """
+
+    images = _image_sets.get((square_size, atlas))
+    if images is not None:
+        return images
+
+    images = {}
+    for piece_name, icon in load_icons().items():
+        width, height = icon.get_size()
+        size = (
+            width * square_size // ICON_SQUARE_SIZE,
+            height * square_size // ICON_SQUARE_SIZE,
+        )
+        if size != (width, height):
+            icon = pygame.transform.smoothscale(icon, size)
+        images[piece_name] = icon.convert_alpha()
+
+    # One row of images, each a view into the atlas
+    if atlas:
+        atlas_surface = pygame.Surface(
+            (
+                sum(image.get_width() for image in images.values()),
+                max(image.get_height() for image in images.values()),
+            ),
+            pygame.SRCALPHA,
+        ).convert_alpha()
+        x = 0
+        for piece_name, image in images.items():
+            # Max of the transparent atlas and the image copies the image exactly
+            atlas_surface.blit(image, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            images[piece_name] = atlas_surface.subsurface(
+                (x, 0, image.get_width(), image.get_height())
+            )
+            x += image.get_width()
+
+    _image_sets[(square_size, atlas)] = images
+    return images
+
+
+def text_image(font, text, color):
+    """
+    return text rendered antialiased with font in color, converted to the
+    display format. the last TEXT_CACHE_SIZE texts used are kept, so drawing
+    the same text again renders nothing.
+    """
+
+    key = (font, text, color)
+    image = _texts.get(key)
+    if image is not None:
+        _texts.move_to_end(key)
+        return image
+
+    image = font.render(text, True, color).convert_alpha()
+    _texts[key] = image
+    if len(_texts) > TEXT_CACHE_SIZE:
+        _texts.popitem(last=False)
+    return image
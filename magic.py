@@ -0,0 +1,186 @@
+import json
+import os
+import random
+
+from tables import (
+    DIAGONAL_DIRECTIONS,
+    STRAIGHT_DIRECTIONS,
+    DIAGONAL_RAYS,
+    STRAIGHT_RAYS,
+)
+
+# Magic bitboards for sliding pieces. for every square the relevant blockers
+# (occupied & mask) are multiplied by a magic number, and the top bits of the
+# 64 bit product index a table holding the attacks for that occupancy.
+
+MASK_64 = (1 << 64) - 1
+
+# Magic numbers are slow to find in python, so they are cached next to this file
+MAGIC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "magics.json")
+
+
+def ray_attacks(square, occupied, rays):
+    """
+    return attacks of a slider on square along rays, stopping at the first blocker.
+    """
+
+    attacks = 0
+    for masks, ascending in rays:
+        ray = masks[square]
+        blockers = ray & occupied
+        if blockers:
+            if ascending:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= masks[blocker]
+        attacks |= ray
+    return attacks
+
+
+def relevant_mask(square, directions):
+    """
+    return bitboard of squares whose occupancy changes the slider's attacks.
+    the last square of each ray never matters, it is attacked either way.
+    """
+
+    row, column = divmod(square, 8)
+    mask = 0
+    for dx, dy in directions:
+        new_row = row + dx
+        new_column = column + dy
+        while 0 <= new_row + dx <= 7 and 0 <= new_column + dy <= 7:
+            mask |= 1 << (new_row * 8 + new_column)
+            new_row += dx
+            new_column += dy
+    return mask
+
+
+def occupancy_subsets(mask):
+    """
+    return every subset of mask, starting with the empty one.
+    """
+
+    subsets = []
+    subset = 0
+    while True:
+        subsets.append(subset)
+        subset = (subset - mask) & mask
+        if subset == 0:
+            return subsets
+
+
+def find_magic(square, directions, rays, rng):
+    """
+    return a magic number mapping every blocker set of square without collisions.
+    """
+
+    mask = relevant_mask(square, directions)
+    shift = 64 - bin(mask).count("1")
+    subsets = occupancy_subsets(mask)
+    attacks = [ray_attacks(square, subset, rays) for subset in subsets]
+
+    while True:
+        # Sparse candidates work best
+        magic = rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        if bin((mask * magic) & 0xFF00000000000000).count("1") < 6:
+            continue
+
+        table = {}
+        for subset, attack in zip(subsets, attacks):
+            index = ((subset * magic) & MASK_64) >> shift
+            if table.setdefault(index, attack) != attack:
+                break
+        else:
+            return magic
+
+
+def generate_magics(seed=2024):
+    """
+    search magic numbers for every square. takes about a minute.
+    """
+
+    rng = random.Random(seed)
+    return {
+        "rook": [
+            find_magic(square, STRAIGHT_DIRECTIONS, STRAIGHT_RAYS, rng)
+            for square in range(64)
+        ],
+        "bishop": [
+            find_magic(square, DIAGONAL_DIRECTIONS, DIAGONAL_RAYS, rng)
+            for square in range(64)
+        ],
+    }
+
+
+def load_magics():
+    """
+    return the cached magic numbers, searching and caching them if there are none.
+    """
+
+    if os.path.exists(MAGIC_FILE):
+        with open(MAGIC_FILE) as file:
+            return json.load(file)
+
+    magics = generate_magics()
+    with open(MAGIC_FILE, "w") as file:
+        json.dump(magics, file, indent=0)
+    return magics
+
+
+def build_tables(directions, rays, magics):
+    """
+    return relevant masks, shifts and filled attack tables for every square.
+    """
+
+    masks = []
+    shifts = []
+    tables = []
+    for square in range(64):
+        mask = relevant_mask(square, directions)
+        shift = 64 - bin(mask).count("1")
+        magic = magics[square]
+
+        table = [0] * (1 << (64 - shift))
+        for subset in occupancy_subsets(mask):
+            table[((subset * magic) & MASK_64) >> shift] = ray_attacks(
+                square, subset, rays
+            )
+
+        masks.append(mask)
+        shifts.append(shift)
+        tables.append(table)
+    return masks, shifts, tables
+
+
+MAGICS = load_magics()
+ROOK_MAGICS = MAGICS["rook"]
+BISHOP_MAGICS = MAGICS["bishop"]
+ROOK_MASKS, ROOK_SHIFTS, ROOK_TABLES = build_tables(
+    STRAIGHT_DIRECTIONS, STRAIGHT_RAYS, ROOK_MAGICS
+)
+BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_TABLES = build_tables(
+    DIAGONAL_DIRECTIONS, DIAGONAL_RAYS, BISHOP_MAGICS
+)
+
+
+def rook_attacks(square, occupied):
+    return ROOK_TABLES[square][
+        ((occupied & ROOK_MASKS[square]) * ROOK_MAGICS[square] & MASK_64)
+        >> ROOK_SHIFTS[square]
+    ]
+
+
+def bishop_attacks(square, occupied):
+    return BISHOP_TABLES[square][
+        ((occupied & BISHOP_MASKS[square]) * BISHOP_MAGICS[square] & MASK_64)
+        >> BISHOP_SHIFTS[square]
+    ]
+
+
+if __name__ == "__main__":
+    # Regenerate the cached magic numbers
+    if os.path.exists(MAGIC_FILE):
+        os.remove(MAGIC_FILE)
+    load_magics()
+    print(f"wrote {MAGIC_FILE}")
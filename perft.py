@@ -0,0 +1,166 @@
+import argparse
+import time
+
+from board import create_board, move_to_uci
+
+# Reference positions and their known leaf counts for depth 1, 2, 3...
+PERFT_POSITIONS = [
+    (
+        "start",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        [20, 400, 8902, 197281, 4865609],
+    ),
+    (
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862, 4085603],
+    ),
+    (
+        "position 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624],
+    ),
+    (
+        "position 4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467, 422333],
+    ),
+    (
+        "position 5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379, 2103487],
+    ),
+    (
+        "position 6",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [46, 2079, 89890, 3894594],
+    ),
+    # Castling and en passant fields that don't match the pieces are dropped
+    (
+        "bad castling",
+        "k7/8/8/8/8/8/8/K6R w K - 0 1",
+        [16, 43, 735, 3803],
+    ),
+    (
+        "bad e.p.",
+        "4k3/8/8/3P4/8/8/8/4K3 w - e6 0 1",
+        [6, 29, 218, 1274],
+    ),
+]
+
+
+def perft(board, depth):
+    """
+    return the number of leaf nodes depth plies below the board's position.
+    """
+
+    if depth == 0:
+        return 1
+
+    moves = board.legal_moves()
+
+    # Leaves don't need to be played
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    """
+    return {uci move: leaf nodes} for every root move, to find which move miscounts.
+    """
+
+    counts = {}
+    for move in board.legal_moves():
+        board.make_move(move)
+        counts[move_to_uci(move)] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def run_suite(max_depth, engine="bitboard"):
+    """
+    run perft on every reference position up to max_depth and print the results.
+    return True if every count matches.
+    """
+
+    all_correct = True
+    total_nodes = 0
+    total_time = 0
+
+    for name, fen, expected_counts in PERFT_POSITIONS:
+        for depth, expected in enumerate(expected_counts[:max_depth], start=1):
+            board = create_board(fen, engine)
+
+            start_time = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start_time
+
+            total_nodes += nodes
+            total_time += elapsed
+            correct = nodes == expected
+            all_correct = all_correct and correct
+
+            print(
+                f"{name:<12} depth {depth}  {nodes:>9} nodes  {elapsed:8.3f}s  "
+                f"{nodes / max(elapsed, 1e-9):>10.0f} nps  "
+                f"{'ok' if correct else f'WRONG, expected {expected}'}"
+            )
+
+    print(
+        f"total {total_nodes} nodes in {total_time:.3f}s, "
+        f"{total_nodes / max(total_time, 1e-9):.0f} nps"
+    )
+    return all_correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="count move generator leaf nodes")
+    parser.add_argument("--fen", help="position to count, default the start position")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument(
+        "--engine", choices=["mailbox", "bitboard", "compact"], default="bitboard"
+    )
+    parser.add_argument(
+        "--divide", action="store_true", help="print leaf nodes per root move"
+    )
+    parser.add_argument(
+        "--suite",
+        action="store_true",
+        help="check the reference positions up to --depth",
+    )
+    arguments = parser.parse_args()
+
+    if arguments.suite:
+        correct = run_suite(arguments.depth, arguments.engine)
+        raise SystemExit(0 if correct else 1)
+
+    if arguments.fen:
+        board = create_board(arguments.fen, arguments.engine)
+    else:
+        board = create_board(PERFT_POSITIONS[0][1], arguments.engine)
+
+    start_time = time.perf_counter()
+    if arguments.divide:
+        counts = divide(board, arguments.depth)
+        for uci, nodes in sorted(counts.items()):
+            print(f"{uci}: {nodes}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(board, arguments.depth)
+    elapsed = time.perf_counter() - start_time
+
+    print(
+        f"depth {arguments.depth}: {nodes} nodes in {elapsed:.3f}s, "
+        f"{nodes / max(elapsed, 1e-9):.0f} nps"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# Move and attack tables, computed once at import so move generators don't
+# repeat offset and bounds arithmetic. squares are (row, col) with row 0 black's
+# back rank, bitboard masks use square index row * 8 + column.
+
+# Move offsets as (row, column)
+KNIGHT_OFFSETS = [
+    (1, 2),
+    (1, -2),
+    (-1, 2),
+    (-1, -2),
+    (2, 1),
+    (2, -1),
+    (-2, 1),
+    (-2, -1),
+]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+DIAGONAL_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+STRAIGHT_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Pawn capture offsets per color, white pawns move up the board
+PAWN_CAPTURE_OFFSETS = {"w": [(-1, -1), (-1, 1)], "b": [(1, -1), (1, 1)]}
+
+
+def offset_squares(offsets):
+    """
+    return [row][column] lists of the (row, col) squares reached by the offsets.
+    """
+
+    table = []
+    for row in range(8):
+        table_row = []
+        for column in range(8):
+            squares = []
+            for dx, dy in offsets:
+                new_row = row + dx
+                new_column = column + dy
+                if 0 <= new_row <= 7 and 0 <= new_column <= 7:
+                    squares.append((new_row, new_column))
+            table_row.append(squares)
+        table.append(table_row)
+    return table
+
+
+def ray_squares(directions):
+    """
+    return [row][column] lists with one ray per direction, each ray a list
+    of (row, col) squares nearest first. empty rays are left out.
+    """
+
+    table = []
+    for row in range(8):
+        table_row = []
+        for column in range(8):
+            rays = []
+            for dx, dy in directions:
+                ray = []
+                new_row = row + dx
+                new_column = column + dy
+                while 0 <= new_row <= 7 and 0 <= new_column <= 7:
+                    ray.append((new_row, new_column))
+                    new_row += dx
+                    new_column += dy
+                if ray:
+                    rays.append(ray)
+            table_row.append(rays)
+        table.append(table_row)
+    return table
+
+
+def pawn_push_squares(color):
+    """
+    return [row][column] lists of the squares a pawn of color pushes to, single
+    push first and the double push from its starting row second.
+    """
+
+    dx, start_row = (-1, 6) if color == "w" else (1, 1)
+
+    table = []
+    for row in range(8):
+        table_row = []
+        for column in range(8):
+            squares = []
+            if 0 <= row + dx <= 7:
+                squares.append((row + dx, column))
+                if row == start_row:
+                    squares.append((row + 2 * dx, column))
+            table_row.append(squares)
+        table.append(table_row)
+    return table
+
+
+KNIGHT_SQUARES = offset_squares(KNIGHT_OFFSETS)
+KING_SQUARES = offset_squares(KING_OFFSETS)
+PAWN_CAPTURE_SQUARES = {
+    color: offset_squares(offsets) for color, offsets in PAWN_CAPTURE_OFFSETS.items()
+}
+PAWN_PUSH_SQUARES = {color: pawn_push_squares(color) for color in ["w", "b"]}
+DIAGONAL_RAY_SQUARES = ray_squares(DIAGONAL_DIRECTIONS)
+STRAIGHT_RAY_SQUARES = ray_squares(STRAIGHT_DIRECTIONS)
+QUEEN_RAY_SQUARES = ray_squares(DIAGONAL_DIRECTIONS + STRAIGHT_DIRECTIONS)
+
+
+def offset_masks(offsets):
+    """
+    return for every square the bitboard of squares reached by the (row, col) offsets.
+    """
+
+    table = offset_squares(offsets)
+
+    masks = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        mask = 0
+        for new_row, new_column in table[row][column]:
+            mask |= 1 << (new_row * 8 + new_column)
+        masks.append(mask)
+    return masks
+
+
+def ray_masks(direction):
+    """
+    return for every square the bitboard of the ray in direction, square itself excluded.
+    """
+
+    table = ray_squares([direction])
+
+    masks = []
+    for square in range(64):
+        row, column = divmod(square, 8)
+        mask = 0
+        for ray in table[row][column]:
+            for new_row, new_column in ray:
+                mask |= 1 << (new_row * 8 + new_column)
+        masks.append(mask)
+    return masks
+
+
+def ascending(direction):
+    """
+    check if direction runs towards higher square indexes.
+    """
+
+    return direction[0] > 0 or (direction[0] == 0 and direction[1] > 0)
+
+
+KNIGHT_ATTACKS = offset_masks(KNIGHT_OFFSETS)
+KING_ATTACKS = offset_masks(KING_OFFSETS)
+
+# Squares attacked by a pawn of each color, index 0 white and 1 black
+PAWN_ATTACKS = [
+    offset_masks(PAWN_CAPTURE_OFFSETS["w"]),
+    offset_masks(PAWN_CAPTURE_OFFSETS["b"]),
+]
+
+# Rays per direction, and whether the direction runs towards higher squares.
+# the first blocker on a ray is the lowest set bit going up, the highest going down.
+DIAGONAL_RAYS = [
+    (ray_masks(direction), ascending(direction)) for direction in DIAGONAL_DIRECTIONS
+]
+STRAIGHT_RAYS = [
+    (ray_masks(direction), ascending(direction)) for direction in STRAIGHT_DIRECTIONS
+]
+
+# Castling rights bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+# Rights that survive a move from or to each square index
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[63] = 15 ^ WHITE_KINGSIDE
+CASTLING_MASKS[56] = 15 ^ WHITE_QUEENSIDE
+CASTLING_MASKS[60] = 15 ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[7] = 15 ^ BLACK_KINGSIDE
+CASTLING_MASKS[0] = 15 ^ BLACK_QUEENSIDE
+CASTLING_MASKS[4] = 15 ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
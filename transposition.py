@@ -0,0 +1,165 @@
+from array import array
+from multiprocessing.sharedctypes import RawArray
+
+from board import PROMOTION_NAMES
+
+# Bound types of stored scores
+EXACT, LOWER_BOUND, UPPER_BOUND = 1, 2, 3
+
+# Bytes per slot, a 64 bit key and a 64 bit packed entry
+SLOT_SIZE = 16
+
+# Packed entry layout, from the low bits up:
+# move 16 bits | bound 2 bits | depth 8 bits | unused | score + SCORE_OFFSET 32 bits
+SCORE_OFFSET = 1 << 31
+NO_MOVE = 0
+
+# Pieces a crazyhouse drop packs, in the promotion bits
+DROP_NAMES = PROMOTION_NAMES + ["p"]
+
+
+def encode_move(move):
+    """
+    pack move (from_location, target_location, promotion) into 16 bits.
+    a crazyhouse drop (None, target_location, piece_name) is packed as a move
+    from its target square to itself, with the piece in the promotion bits.
+    """
+
+    from_location, (target_row, target_column), promotion = move
+    if from_location is None:
+        target_square = target_row * 8 + target_column
+        return (
+            target_square | target_square << 6 | (DROP_NAMES.index(promotion) + 1) << 12
+        )
+
+    from_row, from_column = from_location
+    promotion_index = PROMOTION_NAMES.index(promotion) + 1 if promotion else 0
+    return (
+        (from_row * 8 + from_column)
+        | (target_row * 8 + target_column) << 6
+        | promotion_index << 12
+    )
+
+
+def decode_move(code):
+    """
+    unpack a move packed by encode_move, or None for NO_MOVE.
+    """
+
+    if code == NO_MOVE:
+        return None
+    from_square = code & 63
+    target_square = code >> 6 & 63
+    promotion_index = code >> 12
+    if from_square == target_square:
+        return (
+            None,
+            (target_square // 8, target_square % 8),
+            DROP_NAMES[promotion_index - 1],
+        )
+    return (
+        (from_square // 8, from_square % 8),
+        (target_square // 8, target_square % 8),
+        PROMOTION_NAMES[promotion_index - 1] if promotion_index else None,
+    )
+
+
+def bucket_count(size_mb):
+    """
+    return how many buckets fit in size_mb megabytes.
+    """
+
+    return max(1, size_mb * 1024 * 1024 // (2 * SLOT_SIZE))
+
+
+def shared_buffer(size_mb=16):
+    """
+    return zeroed memory for a table of size_mb, shared with child processes
+    it is handed to when they start.
+    """
+
+    return RawArray("Q", 4 * bucket_count(size_mb))
+
+
+class TranspositionTable:
+    """
+    fixed size hash table of search results, keyed by zobrist hash.
+    entries live in two preallocated arrays of 64 bit ints. every bucket has
+    two slots: the first keeps the deepest result, the second always takes the
+    newest one.
+    a slot's key is stored xored with its entry, so a slot half written by
+    another process sharing the buffer never matches.
+    """
+
+    def __init__(self, size_mb=16, buffer=None):
+        self.bucket_count = bucket_count(size_mb)
+        if buffer is None:
+            self.keys = array("Q", bytes(8 * 2 * self.bucket_count))
+            self.entries = array("Q", bytes(8 * 2 * self.bucket_count))
+        else:
+            # Keys first, then entries, in memory from shared_buffer
+            slots = memoryview(buffer).cast("B").cast("Q")
+            self.keys = slots[: 2 * self.bucket_count]
+            self.entries = slots[2 * self.bucket_count :]
+
+    def clear(self):
+        """
+        empty every slot.
+        """
+
+        empty = array("Q", bytes(8 * 2 * self.bucket_count))
+        self.keys[:] = empty
+        self.entries[:] = empty
+
+    def store(self, key, depth, bound, score, move=None):
+        """
+        store the result of searching the position with hash key to depth.
+        """
+
+        index = (key % self.bucket_count) * 2
+        entry = (
+            (encode_move(move) if move else NO_MOVE)
+            | bound << 16
+            | min(max(depth, 0), 255) << 18
+            | (score + SCORE_OFFSET) << 32
+        )
+
+        # Depth preferred slot, unless it holds a deeper result for another position
+        old_entry = self.entries[index]
+        if self.keys[index] ^ old_entry != key and (old_entry >> 18 & 255) > depth:
+            index += 1
+            old_entry = self.entries[index]
+
+        # Keep the old best move if the new result has none
+        if move is None and self.keys[index] ^ old_entry == key:
+            entry |= old_entry & 0xFFFF
+
+        self.keys[index] = key ^ entry
+        self.entries[index] = entry
+
+    def probe(self, key):
+        """
+        return (depth, bound, score, move) stored for the position with hash key,
+        or None.
+        """
+
+        index = (key % self.bucket_count) * 2
+        for slot in (index, index + 1):
+            entry = self.entries[slot]
+            if entry and self.keys[slot] ^ entry == key:
+                return (
+                    entry >> 18 & 255,
+                    entry >> 16 & 3,
+                    (entry >> 32) - SCORE_OFFSET,
+                    decode_move(entry & 0xFFFF),
+                )
+        return None
+
+    def hashfull(self):
+        """
+        return how many of the first thousand slots are used, in permille.
+        """
+
+        sample = min(1000, len(self.entries))
+        used = sum(1 for entry in self.entries[:sample] if entry)
+        return used * 1000 // sample
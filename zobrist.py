@@ -0,0 +1,54 @@
+import random
+
+# Zobrist keys. a position's hash is the xor of the keys of every piece on its
+# square, the castling rights, the en passant file and the side to move, so a
+# move only has to xor the keys that change. crazyhouse adds hand amounts and
+# promoted pieces. fixed seed, so every engine and every process hashes a
+# position the same way.
+
+_random = random.Random(20240601)
+
+# Piece order of the piece codes, color * 6 + index
+PIECE_ORDER = ["p", "n", "b", "r", "q", "k"]
+
+# [piece code][square index]
+PIECE_CODE_KEYS = [[_random.getrandbits(64) for _ in range(64)] for _ in range(12)]
+
+# Same keys by color and piece name, [color][piece_name][square index]
+PIECE_KEYS = {
+    color: {
+        piece_name: PIECE_CODE_KEYS[color_index * 6 + piece_index]
+        for piece_index, piece_name in enumerate(PIECE_ORDER)
+    }
+    for color_index, color in enumerate(["w", "b"])
+}
+
+# One key per castling right bit, combined for every set of rights
+_CASTLING_RIGHT_KEYS = [_random.getrandbits(64) for _ in range(4)]
+CASTLING_KEYS = []
+for _rights in range(16):
+    _key = 0
+    for _bit in range(4):
+        if _rights >> _bit & 1:
+            _key ^= _CASTLING_RIGHT_KEYS[_bit]
+    CASTLING_KEYS.append(_key)
+
+# [column] of the en passant square
+EN_PASSANT_KEYS = [_random.getrandbits(64) for _ in range(8)]
+
+# Xored in when black is to move
+SIDE_KEY = _random.getrandbits(64)
+
+# Crazyhouse hands, [color][piece_name][amount in hand]. no key for an empty
+# hand, so a position without hand pieces hashes like in standard chess.
+MAX_HAND_AMOUNT = 32
+HAND_KEYS = {
+    color: {
+        piece_name: [0] + [_random.getrandbits(64) for _ in range(MAX_HAND_AMOUNT)]
+        for piece_name in PIECE_ORDER[:5]
+    }
+    for color in ["w", "b"]
+}
+
+# [square index] of a crazyhouse piece promoted from a pawn
+PROMOTED_KEYS = [_random.getrandbits(64) for _ in range(64)]